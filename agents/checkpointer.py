@@ -0,0 +1,136 @@
+"""
+Checkpointing for the travel planning graph.
+
+Every node's output is saved per thread id, so a retried request resumes
+after the last node that succeeded instead of paying for intent extraction
+again. ``CHECKPOINT_BACKEND`` picks a local SQLite file (default, shared by
+every worker on the host, so a retry may land on any of them) or in-memory
+checkpoints, which only suit a single worker; threads expire after
+``CHECKPOINT_TTL_SECONDS`` without use.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.core.config import settings
+from app.core.logger import logger
+
+
+class CheckpointStore:
+    """A LangGraph checkpointer plus last-use tracking for thread expiry"""
+
+    def __init__(self, saver, ttl: float, max_threads: int, conn: Optional[sqlite3.Connection] = None):
+        self.saver = saver
+        self.ttl = ttl
+        self.max_threads = max_threads
+        # Only set for SQLite, where thread ages are shared by workers and
+        # survive restarts. This is the saver's connection, so statements on
+        # it hold the saver's lock to avoid interleaving with its transactions
+        self.conn = conn
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        if conn is not None:
+            with saver.lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS checkpoint_threads "
+                    "(thread_id TEXT PRIMARY KEY, touched_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_checkpoint_touched ON checkpoint_threads (touched_at)")
+
+    def touch(self, thread_id: str):
+        """Mark a thread as used and drop threads that have expired"""
+        if self.conn is not None:
+            self._touch_shared(thread_id)
+            return
+        now = time.time()
+        with self._lock:
+            self._touched[thread_id] = now
+            self._touched.move_to_end(thread_id)
+            expired = []
+            while self._touched:
+                oldest, touched_at = next(iter(self._touched.items()))
+                if touched_at > now - self.ttl and len(self._touched) <= self.max_threads:
+                    break
+                self._touched.popitem(last=False)
+                expired.append(oldest)
+        for stale in expired:
+            self.delete(stale)
+
+    def _touch_shared(self, thread_id: str):
+        """
+        ``touch`` against the shared thread table, so a worker never expires a
+        thread that another worker used recently
+        """
+        now = time.time()
+        with self.saver.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, touched_at) VALUES (?, ?)",
+                (thread_id, now),
+            )
+            expired = [row[0] for row in self.conn.execute(
+                "SELECT thread_id FROM checkpoint_threads WHERE touched_at <= ?", (now - self.ttl,)
+            )]
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM checkpoint_threads").fetchone()
+            overflow = count - len(expired) - self.max_threads
+            if overflow > 0:
+                expired += [row[0] for row in self.conn.execute(
+                    "SELECT thread_id FROM checkpoint_threads WHERE touched_at > ? ORDER BY touched_at LIMIT ?",
+                    (now - self.ttl, overflow),
+                )]
+        for stale in expired:
+            self.delete(stale)
+
+    def delete(self, thread_id: str):
+        try:
+            self.saver.delete_thread(thread_id)
+            if self.conn is not None:
+                with self.saver.lock:
+                    self.conn.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (thread_id,))
+        except Exception as e:
+            logger.warning(f"Could not delete checkpoints for thread {thread_id}: {e}")
+
+
+def _create_sqlite_store() -> Optional[CheckpointStore]:
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        logger.warning("langgraph-checkpoint-sqlite is not installed; using in-memory checkpoints")
+        return None
+
+    def connect() -> sqlite3.Connection:
+        conn = sqlite3.connect(settings.CHECKPOINT_DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    directory = os.path.dirname(settings.CHECKPOINT_DB_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    saver = SqliteSaver(connect())
+    store = CheckpointStore(saver, settings.CHECKPOINT_TTL_SECONDS, settings.CHECKPOINT_MAX_THREADS, saver.conn)
+
+    def reconnect_after_fork():
+        """SQLite connections must not be shared across fork"""
+        saver.conn = store.conn = connect()
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=reconnect_after_fork)
+    return store
+
+
+@lru_cache(maxsize=1)
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """The configured store, built once; None when checkpointing is disabled"""
+    backend = settings.CHECKPOINT_BACKEND
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        store = _create_sqlite_store()
+        if store is not None:
+            return store
+    return CheckpointStore(MemorySaver(), settings.CHECKPOINT_TTL_SECONDS, settings.CHECKPOINT_MAX_THREADS)
@@ -8,17 +8,33 @@ class TravelPlannerState(TypedDict):
     to_location: Optional[str]
     from_station_code: Optional[str]
     to_station_code: Optional[str]
+    # Nearby junctions for places resolved through the gazetteer
+    from_station_candidates: List[Dict[str, Any]]
+    to_station_candidates: List[Dict[str, Any]]
     travel_date: Optional[str]
     time_preference: Optional[str]  
     budget_preference: Optional[str]  
     direct_only: bool
+    # Round trips only; None for one-way journeys
+    return_date: Optional[str]
+    return_time_preference: Optional[str]
+    travel_class: Optional[str]
+    max_fare: Optional[float]
+    sort_by: Optional[str]
     
     available_trains: List[Dict[str, Any]]
     total_trains: int
+    # Per-leg outcome of each transport provider: {"onward": {name: status}, "return": ...}
+    provider_status: Dict[str, Dict[str, Any]]
     
     filtered_trains: List[Dict[str, Any]]
     top_recommendations: List[Dict[str, Any]]
     
+    return_trains: List[Dict[str, Any]]
+    return_filtered_trains: List[Dict[str, Any]]
+    return_top_recommendations: List[Dict[str, Any]]
+    round_trip_options: List[Dict[str, Any]]
+    
     ai_recommendation: str
     reasoning: str
     
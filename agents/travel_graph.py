@@ -1,40 +1,77 @@
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from agents.checkpointer import get_checkpoint_store
 from agents.state import TravelPlannerState
 from app.constants.agent_constant import EXTRACTING_INTENT_ERROR, EXTRACTING_INTENT_NODE
-from app.constants.prompts import TRAVEL_INTENT_PROMPT
-from tools.rail_tool import search_trains, get_station_code_from_city
+from app.constants.prompts import (
+    FOLLOW_UP_INTENT_PROMPT,
+    RECOMMENDATION_SYSTEM_PROMPT,
+    RECOMMENDATION_USER_PROMPT,
+    ROUND_TRIP_SYSTEM_PROMPT,
+    ROUND_TRIP_USER_PROMPT,
+    TRAVEL_INTENT_PROMPT,
+)
+from providers.registry import search_journeys
+from tools.rail_tool import resolve_station
+from app.core.cache import cache
 from app.core.config import settings
-from app.core.logger import logger
-from datetime import datetime
+from app.core.logger import hot_logger, logger
+from app.core.metrics import metrics
+from app.core.profiling import profiled
+from app.core.tracing import current_span, traced
+from model.registry import INTENT_ROLE, RECOMMENDATION_ROLE, invoke_chat
+from datetime import date, datetime, timedelta
+import hashlib
 import time
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import json
 
+INTENT_CACHE_NAMESPACE = "llm_intent"
+RECOMMENDATION_CACHE_NAMESPACE = "llm_recommendation"
+
+# Prompt templates are built once; invoke_chat reuses one chain per template
+INTENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", TRAVEL_INTENT_PROMPT),
+    ("user", "Extract intent from: {query}")
+])
+FOLLOW_UP_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", FOLLOW_UP_INTENT_PROMPT),
+    ("user", "Current intent: {previous_intent}\nFollow-up message: {message}")
+])
+RECOMMENDATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", RECOMMENDATION_SYSTEM_PROMPT),
+    ("user", RECOMMENDATION_USER_PROMPT)
+])
+ROUND_TRIP_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", ROUND_TRIP_SYSTEM_PROMPT),
+    ("user", ROUND_TRIP_USER_PROMPT)
+])
+CHAIN_PROMPTS = [
+    (INTENT_ROLE, INTENT_PROMPT),
+    (INTENT_ROLE, FOLLOW_UP_PROMPT),
+    (RECOMMENDATION_ROLE, RECOMMENDATION_PROMPT),
+    (RECOMMENDATION_ROLE, ROUND_TRIP_PROMPT),
+]
+JSON_PARSER = JsonOutputParser()
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.5,
-    max_output_tokens=1024,
-    transport="rest",  
-    google_api_key=settings.GOOGLE_API_KEY
-)
 
 def extract_intent_node(state: TravelPlannerState) -> Dict[str, Any]:
     try:
-        logger.info(EXTRACTING_INTENT_NODE)
+        hot_logger.info(EXTRACTING_INTENT_NODE)
         start_time = time.time()
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", TRAVEL_INTENT_PROMPT),
-            ("user", "Extract intent from: {query}")
-        ])
-    
-        chain = prompt | llm | JsonOutputParser()
-        intent = chain.invoke({"query": state["user_query"]})
+        query_key = " ".join(state["user_query"].lower().split())
+        intent = cache.get(INTENT_CACHE_NAMESPACE, settings.LLM_INTENT_MODEL, query_key)
+        current_span().set_attribute("cache_hit", intent is not None)
+        if intent is None:
+            message = invoke_chat(INTENT_ROLE, INTENT_PROMPT, {"query": state["user_query"]})
+            intent = JSON_PARSER.invoke(message)
+            cache.set(INTENT_CACHE_NAMESPACE, settings.LLM_INTENT_MODEL, query_key, value=intent, ttl=settings.LLM_CACHE_TTL_SECONDS)
         
         processing_time = time.time() - start_time
         
@@ -46,6 +83,8 @@ def extract_intent_node(state: TravelPlannerState) -> Dict[str, Any]:
             "time_preference": intent.get("time_preference", "any"),
             "budget_preference": intent.get("budget_preference", "any"),
             "direct_only": intent.get("direct_only", False),
+            "return_date": intent.get("return_date"),
+            "return_time_preference": intent.get("return_time_preference") or ("any" if intent.get("return_date") else None),
             "current_step": "intent_extracted",
             "processing_time": processing_time,
             "timestamp": datetime.now().isoformat()
@@ -59,8 +98,39 @@ def extract_intent_node(state: TravelPlannerState) -> Dict[str, Any]:
             "current_step": "error"
         }
 
+INTENT_FIELDS = [
+    "from_location",
+    "to_location",
+    "travel_date",
+    "time_preference",
+    "budget_preference",
+    "direct_only",
+    "return_date",
+    "return_time_preference",
+]
+
+def extract_follow_up_intent(state: TravelPlannerState, message: str) -> Dict[str, Any]:
+    """
+    Update the intent of a previous conversation turn with a follow-up message.
+    Fields the user did not mention keep their previous values.
+    """
+    previous_intent = {field: state.get(field) for field in INTENT_FIELDS}
+    previous_json = json.dumps(previous_intent, sort_keys=True)
+    message_key = " ".join(message.lower().split())
+
+    intent = cache.get(INTENT_CACHE_NAMESPACE, settings.LLM_INTENT_MODEL, previous_json, message_key)
+    if intent is None:
+        response = invoke_chat(INTENT_ROLE, FOLLOW_UP_PROMPT, {"previous_intent": previous_json, "message": message})
+        intent = JSON_PARSER.invoke(response)
+        cache.set(INTENT_CACHE_NAMESPACE, settings.LLM_INTENT_MODEL, previous_json, message_key, value=intent, ttl=settings.LLM_CACHE_TTL_SECONDS)
+
+    return {
+        field: intent.get(field, previous_intent[field])
+        for field in INTENT_FIELDS
+    }
+
 def validate_locations_node(state: TravelPlannerState) -> Dict[str, Any]:
-    logger.info("")
+    hot_logger.info("Node: Validating locations")
     
     from_loc = state.get("from_location")
     to_loc = state.get("to_location")
@@ -76,15 +146,31 @@ def validate_locations_node(state: TravelPlannerState) -> Dict[str, Any]:
     
     # Get station codes using the tool
     try:
-        from_code = get_station_code_from_city.invoke(from_loc)
-        to_code = get_station_code_from_city.invoke(to_loc)
+        from_station = resolve_station(from_loc)
+        to_station = resolve_station(to_loc)
+        from_code, to_code = from_station["code"], to_station["code"]
         
-        logger.info(f"Station codes: {from_loc} -> {from_code}, {to_loc} -> {to_code}")
+        hot_logger.info("Station codes: %s -> %s, %s -> %s", from_loc, from_code, to_loc, to_code)
+        
+        # Ask instead of sending a search that cannot succeed
+        unresolved = [loc for loc, code in ((from_loc, from_code), (to_loc, to_code)) if not code]
+        if unresolved:
+            return {
+                **state,
+                "needs_clarification": True,
+                "clarification_message": (
+                    f"I couldn't find a railway station for {' or '.join(repr(loc) for loc in unresolved)}. "
+                    "Could you give the nearest major city or the station code?"
+                ),
+                "current_step": "needs_clarification"
+            }
         
         return {
             **state,
             "from_station_code": from_code,
             "to_station_code": to_code,
+            "from_station_candidates": from_station["candidates"],
+            "to_station_candidates": to_station["candidates"],
             "current_step": "locations_validated",
             "needs_clarification": False
         }
@@ -101,7 +187,7 @@ def fetch_trains_node(state: TravelPlannerState) -> Dict[str, Any]:
     """
     Node 3: Fetch available trains using LangChain tool
     """
-    logger.info("Node: Fetching train data")
+    hot_logger.info("Node: Fetching train data")
     
     from_code = state.get("from_station_code")
     to_code = state.get("to_station_code")
@@ -114,28 +200,40 @@ def fetch_trains_node(state: TravelPlannerState) -> Dict[str, Any]:
         }
     
     try:
-        # Use the LangChain tool to fetch trains
-        result = search_trains.invoke({
-            "from_station": from_code,
-            "to_station": to_code,
-            "hours": 24
-        })
+        from_loc, to_loc = state.get("from_location"), state.get("to_location")
+        alternatives = _alternative_station_pairs(state)
+        legs = [partial(_search_leg, from_code, to_code, from_loc, to_loc, alternatives)]
+        if state.get("return_date"):
+            legs.append(partial(_search_leg, to_code, from_code, to_loc, from_loc, [(t, f) for f, t in alternatives]))
+        # Both legs of a round trip are searched at the same time, each across
+        # all enabled transport providers
+        (from_code, to_code, result), *return_leg = _run_concurrently(legs)
         
         if not result.get("success"):
             return {
                 **state,
                 "error": result.get("error", "Failed to fetch trains"),
+                "provider_status": {"onward": result.get("providers", {})},
                 "current_step": "error"
             }
         
-        trains = result.get("trains", [])
-        
-        return {
+        trains = result.get("journeys", [])
+        update = {
             **state,
+            "from_station_code": from_code,
+            "to_station_code": to_code,
             "available_trains": trains,
             "total_trains": len(trains),
+            "provider_status": {"onward": result.get("providers", {})},
             "current_step": "trains_fetched"
         }
+        if return_leg:
+            return_result = return_leg[0][2]
+            if not return_result.get("success"):
+                logger.warning(f"Return leg search failed: {return_result.get('error')}")
+            update["return_trains"] = return_result.get("journeys", [])
+            update["provider_status"]["return"] = return_result.get("providers", {})
+        return update
         
     except Exception as e:
         logger.error(f"Train fetching error: {str(e)}")
@@ -145,14 +243,54 @@ def fetch_trains_node(state: TravelPlannerState) -> Dict[str, Any]:
             "current_step": "error"
         }
 
+def _search_leg(
+    from_code: str, to_code: str, from_loc: Optional[str], to_loc: Optional[str], alternatives: List[Tuple[str, str]]
+) -> Tuple[str, str, Dict[str, Any]]:
+    """Search one leg, moving on to the alternative station pairs while it has no journeys"""
+    result = search_journeys(from_code, to_code, 24, from_loc, to_loc)
+    if result.get("success") and not result.get("journeys"):
+        # A town resolved through the gazetteer may be better served by
+        # another nearby junction than the closest one
+        for alt_from, alt_to in alternatives:
+            alternative = search_journeys(alt_from, alt_to, 24, from_loc, to_loc)
+            if alternative.get("success") and alternative.get("journeys"):
+                hot_logger.info("No trains %s -> %s, using %s -> %s", from_code, to_code, alt_from, alt_to)
+                return alt_from, alt_to, alternative
+    return from_code, to_code, result
+
+def _run_concurrently(calls: List[Callable[[], Any]]) -> List[Any]:
+    """Run blocking calls in parallel threads, each in a copy of the caller's context so spans and request ids follow"""
+    if len(calls) == 1:
+        return [calls[0]()]
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, profiled(call)) for call in calls]
+        return [future.result() for future in futures]
+
+def _alternative_station_pairs(state: TravelPlannerState):
+    """Other nearby junction pairs to search, closest first, bounded by NEAREST_STATION_CANDIDATES"""
+    from_candidates = state.get("from_station_candidates") or [{"code": state["from_station_code"], "distance_km": 0}]
+    to_candidates = state.get("to_station_candidates") or [{"code": state["to_station_code"], "distance_km": 0}]
+    primary = (state["from_station_code"], state["to_station_code"])
+    pairs = sorted(
+        ((f["distance_km"] + t["distance_km"], f["code"], t["code"]) for f in from_candidates for t in to_candidates
+         if (f["code"], t["code"]) != primary and f["code"] != t["code"])
+    )
+    return [(f, t) for _, f, t in pairs[:settings.NEAREST_STATION_CANDIDATES]]
+
+PREMIUM_CLASSES = {"1A", "2A", "EC", "EA"}
+SORT_KEYS = {
+    "departure": lambda t: _departure_time(t),
+    "arrival": lambda t: (t.get("arrival") or {}).get("time") or "99:99",
+    "duration": lambda t: t.get("duration_mins") or float("inf"),
+}
+
 def analyze_trains_node(state: TravelPlannerState) -> Dict[str, Any]:
     """
     Node 4: Analyze and filter trains based on preferences
     """
-    logger.info("Node: Analyzing trains")
+    hot_logger.info("Node: Analyzing trains")
     
     trains = state.get("available_trains", [])
-    time_pref = state.get("time_preference", "any")
     
     if not trains:
         return {
@@ -162,27 +300,160 @@ def analyze_trains_node(state: TravelPlannerState) -> Dict[str, Any]:
             "error": "No trains available for this route"
         }
     
-    # Filter trains based on time preference
-    filtered = trains
-    if time_pref != "any":
-        filtered = [t for t in trains if _matches_time_preference(t, time_pref)]
-    
-    # Sort by departure time
-    try:
-        filtered.sort(key=lambda x: x.get("from_std", "00:00"))
-    except:
-        pass
-    
-    return {
+    filtered = _filter_and_sort_trains(trains, state.get("time_preference") or "any", state)
+    update = {
         **state,
         "filtered_trains": filtered,
         "current_step": "trains_analyzed"
     }
+    if state.get("return_date"):
+        return_filtered = _filter_and_sort_trains(
+            state.get("return_trains") or [], state.get("return_time_preference") or "any", state
+        )
+        update["return_filtered_trains"] = return_filtered
+        update["round_trip_options"] = _rank_round_trips(filtered[:5], return_filtered[:5], state)
+    return update
+
+def _filter_and_sort_trains(trains: List[Dict], time_pref: str, state: TravelPlannerState) -> List[Dict]:
+    """Apply the time, class, budget and direct-only preferences of ``state`` to one leg"""
+    budget_pref = state.get("budget_preference") or "any"
+    travel_class = state.get("travel_class")
+    max_fare = state.get("max_fare")
+    
+    # Filter trains based on time preference, class, budget and changes
+    filtered = list(trains)
+    if state.get("direct_only"):
+        filtered = [t for t in filtered if not t.get("changes")]
+    if time_pref != "any":
+        filtered = [t for t in filtered if _matches_time_preference(t, time_pref)]
+    if travel_class:
+        filtered = [t for t in filtered if travel_class in (t.get("available_classes") or [])]
+    if budget_pref == "premium" and not travel_class:
+        filtered = [t for t in filtered if PREMIUM_CLASSES & set(t.get("available_classes") or [])]
+    if max_fare is not None:
+        filtered = [t for t in filtered if _train_fare(t, travel_class) <= max_fare]
+    
+    # Budget travellers see the cheapest options first, everyone else by departure
+    sort_by = state.get("sort_by") or ("fare" if budget_pref == "budget" else "departure")
+    if sort_by == "fare":
+        filtered.sort(key=lambda t: _train_fare(t, travel_class))
+    else:
+        filtered.sort(key=SORT_KEYS.get(sort_by, SORT_KEYS["departure"]))
+    return filtered
+
+def _rank_round_trips(onward: List[Dict], returns: List[Dict], state: TravelPlannerState) -> List[Dict[str, Any]]:
+    """
+    Pair onward and return trains and rank the pairs jointly: by total fare
+    for budget travellers, otherwise by time at the destination. Indexes
+    point into the filtered onward and return lists.
+    """
+    travel_class = state.get("travel_class")
+    today = date.today()
+    onward_date = _parse_travel_date(state.get("travel_date"), today)
+    return_date = _parse_travel_date(state.get("return_date"), today, not_before=onward_date)
+    
+    options = []
+    for i, out in enumerate(onward):
+        arrival = _train_datetime(out, onward_date, arrive=True)
+        for j, back in enumerate(returns):
+            departure = _train_datetime(back, return_date)
+            hours = round((departure - arrival).total_seconds() / 3600, 1) if arrival and departure else None
+            if hours is not None and hours < 0:
+                continue
+            total_fare = _train_fare(out, travel_class) + _train_fare(back, travel_class)
+            options.append({
+                "onward_index": i,
+                "return_index": j,
+                "total_fare": total_fare if total_fare != float("inf") else None,
+                "hours_at_destination": hours,
+            })
+    
+    by_fare = (state.get("sort_by") or ("fare" if state.get("budget_preference") == "budget" else None)) == "fare"
+    def rank(option):
+        fare = option["total_fare"] if option["total_fare"] is not None else float("inf")
+        stay = option["hours_at_destination"] or 0
+        return (fare, -stay) if by_fare else (-stay, fare)
+    return sorted(options, key=rank)[:settings.ROUND_TRIP_MAX_OPTIONS]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DATE_FORMATS = ("%d %b", "%d %B", "%b %d", "%B %d", "%d/%m/%Y", "%d-%m-%Y")
+
+def _parse_travel_date(value: Optional[str], today: date, not_before: Optional[date] = None) -> Optional[date]:
+    """
+    Resolve the intent's date text ('2025-03-14', 'tomorrow', 'next friday',
+    '14 March') to a date. Weekdays resolve to the first such day on or after
+    ``not_before``; None when the text cannot be read.
+    """
+    if not value:
+        return None
+    text = " ".join(str(value).lower().replace(",", " ").split())
+    for word in ("next ", "this ", "on "):
+        if text.startswith(word):
+            text = text[len(word):]
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    if text == "today":
+        return today
+    if text == "tomorrow":
+        return today + timedelta(days=1)
+    if text == "day after tomorrow":
+        return today + timedelta(days=2)
+    if text in WEEKDAYS:
+        start = not_before or today
+        return start + timedelta(days=(WEEKDAYS.index(text) - start.weekday()) % 7)
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            parsed = parsed.replace(year=today.year)
+            if parsed < today:
+                parsed = parsed.replace(year=today.year + 1)
+        return parsed
+    return None
+
+def _train_datetime(train: Dict, day: Optional[date], arrive: bool = False) -> Optional[datetime]:
+    """Departure (or arrival, via the journey duration) of ``train`` on ``day``"""
+    if day is None:
+        return None
+    try:
+        hour, minute = (int(part) for part in _departure_time(train).split(":")[:2])
+    except ValueError:
+        return None
+    moment = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, minutes=minute)
+    if arrive:
+        if not train.get("duration_mins"):
+            return None
+        moment += timedelta(minutes=int(train["duration_mins"]))
+    return moment
+
+def _departure_time(train: Dict) -> str:
+    return (train.get("departure") or {}).get("time") or "00:00"
+
+def _train_fare(train: Dict, travel_class: Optional[str] = None) -> float:
+    """Lowest general-quota fare, for ``travel_class`` when given"""
+    availability = train.get("availability") or {}
+    classes = [travel_class] if travel_class else list(availability)
+    fares = []
+    for class_type in classes:
+        try:
+            fare = float(availability[class_type]["general"]["fare"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if fare > 0:
+            fares.append(fare)
+    if not fares and not travel_class and train.get("fare"):
+        # Bus and flight journeys carry a single fare instead of per-class availability
+        fares.append(float(train["fare"]))
+    return min(fares) if fares else float("inf")
 
 def _matches_time_preference(train: Dict, time_pref: str) -> bool:
     """Helper to match train time with preference"""
     try:
-        dept_time = train.get("from_std", "00:00")
+        dept_time = _departure_time(train)
         hour = int(dept_time.split(":")[0])
         
         if time_pref == "morning" and 6 <= hour < 12:
@@ -201,7 +472,7 @@ def generate_recommendations_node(state: TravelPlannerState) -> Dict[str, Any]:
     """
     Node 5: Generate AI-powered recommendations using LLM
     """
-    logger.info("Node: Generating AI recommendations")
+    hot_logger.info("Node: Generating AI recommendations")
     
     filtered_trains = state.get("filtered_trains", [])
     
@@ -214,56 +485,53 @@ def generate_recommendations_node(state: TravelPlannerState) -> Dict[str, Any]:
             "current_step": "completed"
         }
     
-    # Prepare train data for LLM (top 5)
+    # Prepare train data for LLM (top 5 per leg)
     top_trains = filtered_trains[:5]
+    return_top_trains = state.get("return_filtered_trains", [])[:5] if state.get("return_date") else []
+    # A round trip with no usable return train is recommended as one way
+    round_trip = bool(return_top_trains)
     
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an expert Indian Railways travel advisor. Analyze the available trains and provide personalized recommendations.
-            Consider:
-            1. Departure and arrival times
-            2. Journey duration
-            3. Train type and class
-            4. User's time preferences
-
-            Provide:
-            - Top 3 train recommendations with clear reasoning
-            - Pros and cons of each option
-            - Best overall choice
-
-            Be concise, friendly, and practical."""),
-            ("user", """User preferences:
-            - From: {from_location} ({from_code})
-            - To: {to_location} ({to_code})
-            - Time preference: {time_pref}
-            - Budget: {budget_pref}
-                Available trains:
-                {trains_data}
-            Provide your recommendations:""")
-    ])
+    system_prompt, user_prompt, prompt = (
+        (ROUND_TRIP_SYSTEM_PROMPT, ROUND_TRIP_USER_PROMPT, ROUND_TRIP_PROMPT) if round_trip
+        else (RECOMMENDATION_SYSTEM_PROMPT, RECOMMENDATION_USER_PROMPT, RECOMMENDATION_PROMPT)
+    )
     
     try:
-        trains_data = "\n".join([
-            f"Train {i+1}: {t.get('train_name', 'N/A')} ({t.get('train_number', 'N/A')}) - "
-            f"Departs: {t.get('from_std', 'N/A')}, Arrives: {t.get('to_std', 'N/A')}, "
-            f"Duration: {t.get('duration', 'N/A')}"
-            for i, t in enumerate(top_trains)
-        ])
-        
-        chain = prompt | llm
-        recommendation = chain.invoke({
+        max_tokens = settings.RECOMMENDATION_MAX_PROMPT_TOKENS - _estimate_tokens(system_prompt + user_prompt)
+        inputs = {
             "from_location": state.get("from_location"),
             "from_code": state.get("from_station_code"),
             "to_location": state.get("to_location"),
             "to_code": state.get("to_station_code"),
             "time_pref": state.get("time_preference"),
             "budget_pref": state.get("budget_preference"),
-            "trains_data": trains_data
-        })
+        }
+        if round_trip:
+            # Both legs and their pairings go into one call
+            pairs_data = _encode_round_trip_options(state.get("round_trip_options", []))
+            leg_tokens = (max_tokens - _estimate_tokens(pairs_data)) // 2
+            inputs.update({
+                "travel_date": state.get("travel_date"),
+                "return_date": state.get("return_date"),
+                "return_time_pref": state.get("return_time_preference"),
+                "onward_data": _encode_trains_table(top_trains, max_tokens=leg_tokens),
+                "return_data": _encode_trains_table(return_top_trains, max_tokens=leg_tokens, prefix="R"),
+                "pairs_data": pairs_data,
+            })
+        else:
+            inputs["trains_data"] = _encode_trains_table(top_trains, max_tokens=max_tokens)
+        inputs_key = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+        recommendation = cache.get(RECOMMENDATION_CACHE_NAMESPACE, settings.LLM_RECOMMENDATION_MODEL, inputs_key)
+        current_span().set_attribute("cache_hit", recommendation is not None)
+        if recommendation is None:
+            recommendation = invoke_chat(RECOMMENDATION_ROLE, prompt, inputs).content
+            cache.set(RECOMMENDATION_CACHE_NAMESPACE, settings.LLM_RECOMMENDATION_MODEL, inputs_key, value=recommendation, ttl=settings.LLM_CACHE_TTL_SECONDS)
         
         return {
             **state,
-            "ai_recommendation": recommendation.content,
+            "ai_recommendation": recommendation,
             "top_recommendations": top_trains[:3],
+            "return_top_recommendations": return_top_trains[:3],
             "reasoning": "Analysis based on departure times, duration, and user preferences",
             "current_step": "completed"
         }
@@ -274,10 +542,85 @@ def generate_recommendations_node(state: TravelPlannerState) -> Dict[str, Any]:
             **state,
             "ai_recommendation": "Here are the available trains. Please review the options above.",
             "top_recommendations": top_trains[:3],
+            "return_top_recommendations": return_top_trains[:3],
             "reasoning": "Basic listing due to processing error",
             "current_step": "completed"
         }
 
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for prompt budgeting"""
+    return len(text) // 4 + 1
+
+def _compact_status(status: str) -> str:
+    """'AVAILABLE-0042' -> 'AVL42', 'RAC 5' -> 'RAC5', 'NOT AVAILABLE' -> 'NA'"""
+    status = (status or "").upper().replace(" ", "")
+    if status.startswith("AVAILABLE"):
+        count = status[len("AVAILABLE"):].lstrip("-").lstrip("0")
+        return f"AVL{count}"
+    if status.startswith("NOTAVAILABLE"):
+        return "NA"
+    if status.startswith("REGRET"):
+        return "REG"
+    return status or "NA"
+
+def _format_duration(minutes) -> str:
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        return "?"
+    return f"{minutes // 60}h{minutes % 60:02d}"
+
+def _encode_train_row(index: str, train: Dict) -> str:
+    classes = []
+    for class_type, quotas in (train.get("availability") or {}).items():
+        general = quotas.get("general", {})
+        cell = f"{class_type}:{_compact_status(general.get('status'))} Rs{general.get('fare', '?')}"
+        prediction = general.get("prediction_percentage")
+        if prediction and not cell.split(":")[1].startswith("AVL"):
+            cell += f" {prediction}%"
+        classes.append(cell)
+    if not classes and train.get("fare"):
+        classes.append(f"Rs{train['fare']}")
+    name = str(train.get("train_name") or "?")
+    if train.get("mode", "rail") != "rail":
+        name = f"{train['mode']}:{name}"
+    return "|".join([
+        str(index),
+        str(train.get("train_number") or "?"),
+        name,
+        (train.get("departure") or {}).get("time") or "?",
+        (train.get("arrival") or {}).get("time") or "?",
+        _format_duration(train.get("duration_mins")),
+        ";".join(classes) or "-",
+    ])
+
+def _encode_round_trip_options(options: List[Dict[str, Any]]) -> str:
+    """'1+R2|Rs3100|52.5h' per pairing; numbers match the onward and return tables"""
+    rows = []
+    for option in options:
+        fare = f"Rs{option['total_fare']:.0f}" if option["total_fare"] is not None else "Rs?"
+        hours = f"{option['hours_at_destination']}h" if option["hours_at_destination"] is not None else "?"
+        rows.append(f"{option['onward_index'] + 1}+R{option['return_index'] + 1}|{fare}|{hours}")
+    return "\n".join(rows) or "-"
+
+def _encode_trains_table(trains, max_tokens: int, prefix: str = "") -> str:
+    """
+    One compact row per journey built from the common journey fields.
+    Rows that would push the table past ``max_tokens`` are dropped (the first
+    row is always kept).
+    """
+    rows = []
+    used_tokens = 0
+    for i, train in enumerate(trains):
+        row = _encode_train_row(f"{prefix}{i + 1}", train)
+        row_tokens = _estimate_tokens(row)
+        if rows and used_tokens + row_tokens > max_tokens:
+            metrics.increment("llm.prompt_rows_dropped", len(trains) - i, role=RECOMMENDATION_ROLE)
+            break
+        rows.append(row)
+        used_tokens += row_tokens
+    return "\n".join(rows)
+
 def should_continue(state: TravelPlannerState) -> str:
     """
     Router function to determine next node based on state
@@ -303,19 +646,40 @@ def should_continue(state: TravelPlannerState) -> str:
     else:
         return END
 
+# Each node runs in its own trace span, and in the request's profile when it
+# runs on one of LangGraph's pool threads
+NODES = {
+    name: traced(f"node.{name}", profiled(node))
+    for name, node in {
+        "extract_intent": extract_intent_node,
+        "validate_locations": validate_locations_node,
+        "fetch_trains": fetch_trains_node,
+        "analyze_trains": analyze_trains_node,
+        "generate_recommendations": generate_recommendations_node,
+    }.items()
+}
+
+def run_from_node(state: TravelPlannerState, node_name: str) -> Dict[str, Any]:
+    """
+    Run the workflow starting at ``node_name``, following the same routing as the
+    compiled graph. Used to re-run only the nodes affected by a change.
+    """
+    while node_name in NODES:
+        state = NODES[node_name](state)
+        node_name = should_continue(state)
+    return state
+
 # Build the graph
-def create_travel_planning_graph():
+def create_travel_planning_graph(checkpointer=None):
     """
-    Create the LangGraph workflow for travel planning
+    Create the LangGraph workflow for travel planning. With a checkpointer,
+    each node's output is saved under the ``thread_id`` of the run config.
     """
     workflow = StateGraph(TravelPlannerState)
     
     # Add nodes
-    workflow.add_node("extract_intent", extract_intent_node)
-    workflow.add_node("validate_locations", validate_locations_node)
-    workflow.add_node("fetch_trains", fetch_trains_node)
-    workflow.add_node("analyze_trains", analyze_trains_node)
-    workflow.add_node("generate_recommendations", generate_recommendations_node)
+    for name, node in NODES.items():
+        workflow.add_node(name, node)
     
     # Set entry point
     workflow.set_entry_point("extract_intent")
@@ -370,8 +734,12 @@ def create_travel_planning_graph():
         }
     )
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
-# Create the compiled graph
-travel_planner_graph = create_travel_planning_graph()
-logger.info("Travel planning graph created successfully")
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_travel_planner_graph():
+    """Compile the workflow once, on first use"""
+    store = get_checkpoint_store()
+    graph = create_travel_planning_graph(store.saver if store else None)
+    logger.info("Travel planning graph created successfully")
+    return graph
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from app.api.v1.endpoints import planner, route
+from app.utils.responses import FastJSONResponse
 
-api_router = APIRouter()
+api_router = APIRouter(default_response_class=FastJSONResponse)
 api_router.include_router(planner.router, tags=["planner"])
 api_router.include_router(route.router, tags=["planner"])
\ No newline at end of file
@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Query, Body
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Query, Body, Header, Request, WebSocket
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+from pydantic_core import PydanticCustomError
 from app.constants.agent_constant import ERROR_STATE, INVOKE_AGENT_STATE
-from services.agent_orchestrator import TravelAgentOrchestrator
-from tools.rail_tool import search_trains, search_station_code
-from app.core.logger import logger
-from typing import Optional, List
+from app.constants.common import WORKFLOW_DESCRIPTION
+from services.agent_loader import run_agent
+from services.job_queue import job_queue, public_job
+from services.live_board import live_board
+from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.metrics import metrics
+from app.core.middleware import content_etag
+from app.core.profiling import is_admin, profile_store
+from app.core.security import callback_url_error, resolves_to_public_host
+from app.utils.exceptions import AppException
+from tools.rail_tool import query_availability, search_trains_json, search_station_code
+from app.utils.responses import FastJSONResponse
+from app.utils.serialization import dumps
+from app.core.logger import hot_logger, logger
+from typing import Literal, Optional, List
+import asyncio
 
 router = APIRouter()
-agent = TravelAgentOrchestrator()
 
 class TripPlanRequest(BaseModel):
     """Request model for trip planning"""
     query: str = Field(..., description="Natural language query for trip planning", 
                        example="I want to travel from Delhi to Mumbai tomorrow morning")
+    thread_id: Optional[str] = Field(None, description="Send the thread_id of a failed attempt to resume it")
     
 class DirectTrainRequest(BaseModel):
     """Request model for direct train search"""
@@ -20,18 +35,114 @@ class DirectTrainRequest(BaseModel):
     to_station: str = Field(..., description="Destination station code", example="BCT")
     hours: Optional[int] = Field(24, description="Time window in hours", ge=1, le=72)
 
+class TripPlanJobRequest(TripPlanRequest):
+    """Request model for an asynchronous trip planning job"""
+    webhook_url: Optional[HttpUrl] = Field(None, description="Public http(s) URL to POST the finished job to",
+                                           example="https://example.com/hooks/tripmate")
+
+    @field_validator("webhook_url")
+    @classmethod
+    def check_webhook_url(cls, value: Optional[HttpUrl]) -> Optional[HttpUrl]:
+        if value is not None:
+            error = callback_url_error(str(value))
+            if error:
+                # Not a ValueError: its exception object would end up in the
+                # (JSON) validation error response
+                raise PydanticCustomError("webhook_url", "webhook_url {reason}", {"reason": error})
+        return value
+
+class RefilterRequest(BaseModel):
+    """Request model for re-filtering a stored result set"""
+    time_preference: Optional[Literal["morning", "afternoon", "evening", "night", "any"]] = Field(None, description="Departure time of day")
+    budget_preference: Optional[Literal["budget", "standard", "premium", "any"]] = Field(None, description="Budget preference")
+    travel_class: Optional[str] = Field(None, description="Travel class code", example="3A")
+    max_fare: Optional[float] = Field(None, description="Maximum general quota fare", gt=0)
+    sort_by: Optional[Literal["departure", "arrival", "duration", "fare"]] = Field(None, description="Sort order")
+
 class ConversationRequest(BaseModel):
     """Request model for conversational queries"""
     message: str = Field(..., description="User message")
     conversation_history: Optional[List[dict]] = Field(default=[], description="Previous messages")
+    session_id: Optional[str] = Field(None, description="Session id returned by a previous turn")
 
 @router.post("/plan-trip")
 async def plan_trip(request: TripPlanRequest):
     try:
-        logger.info(f"{INVOKE_AGENT_STATE} {request.query}")
-        result = agent.plan_trip(request.query)
-        return result
+        hot_logger.info("%s %s", INVOKE_AGENT_STATE, request.query)
+        result = await run_agent("plan_trip", request.query, request.thread_id)
+        return FastJSONResponse(content=result)
         
+    except AppException:
+        raise
+    except Exception as e:
+        logger.error(f"{ERROR_STATE} {str(e)}", exc_info=True)
+        return {
+            "success": False,
+            "error": f"{ERROR_STATE} {str(e)}",
+        }
+
+@router.post("/jobs/plan-trip",
+             status_code=202,
+             summary="Submit Trip Planning Job",
+             description="Queue a trip plan and return immediately; poll the job or receive a webhook")
+async def submit_plan_trip_job(
+    request: TripPlanJobRequest,
+    idempotency_key: Optional[str] = Header(None, description="Resubmissions with the same key return the same job"),
+):
+    """
+    Asynchronous version of /plan-trip
+
+    Returns a `job_id`; poll /jobs/{job_id} until `status` is `succeeded` or
+    `failed`, or pass `webhook_url` to have the finished job POSTed to you.
+    """
+    webhook_url = str(request.webhook_url) if request.webhook_url else None
+    if webhook_url and not await resolves_to_public_host(webhook_url):
+        raise AppException("webhook_url must resolve to a public address", status_code=422)
+    job, created = job_queue.submit(request.query, idempotency_key, webhook_url, request.thread_id)
+    return FastJSONResponse(status_code=202 if created else 200, content=public_job(job))
+
+@router.get("/jobs/{job_id}",
+            summary="Get Job Status",
+            description="Status and, once finished, the result of a trip planning job")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise AppException("Job not found or expired", status_code=404)
+    return FastJSONResponse(content=public_job(job))
+
+@router.post("/results/{result_id}/refilter",
+             summary="Re-filter Results",
+             description="Re-rank a previous /plan-trip result with new filters, without new API or AI calls")
+async def refilter_results(result_id: str, request: RefilterRequest):
+    """
+    Apply new filters and sort order to a stored result set
+
+    Use the `result_id` returned by /plan-trip or /conversation. Only the
+    fields you send are changed; the rest keep their previous values.
+    """
+    result = await run_agent("refilter", result_id, request.model_dump(exclude_unset=True))
+    if result is None:
+        raise AppException("Result not found or expired", status_code=404)
+    return FastJSONResponse(content=result)
+
+@router.post("/conversation",
+             summary="Conversational Trip Planning",
+             description="Multi-turn trip planning that reuses the previous turn's results")
+async def conversation(request: ConversationRequest):
+    """
+    Continue a trip-planning conversation
+
+    Pass the `session_id` from the previous response to refine the search.
+    Only the steps affected by the change are re-run, e.g. a new time
+    preference re-filters the cached trains without fetching them again.
+    """
+    try:
+        hot_logger.info("%s %s", INVOKE_AGENT_STATE, request.message)
+        result = await run_agent("converse", request.message, request.session_id, request.conversation_history)
+        return FastJSONResponse(content=result)
+
+    except AppException:
+        raise
     except Exception as e:
         logger.error(f"{ERROR_STATE} {str(e)}", exc_info=True)
         return {
@@ -48,14 +159,26 @@ async def search_trains_direct(request: DirectTrainRequest):
     
     Use this when you already know the exact station codes.
     For automatic station code lookup, use /plan-trip instead.
+    Use GET /trains/search to revalidate with If-None-Match and get 304s.
     """
+    return await _search_trains_response(request.from_station, request.to_station, request.hours)
+
+@router.get("/trains/search",
+            summary="Direct Train Search (cacheable)",
+            description="Same as POST /trains/search; supports If-None-Match revalidation")
+async def search_trains_direct_get(
+    from_station: str = Query(..., description="Source station code", example="NDLS"),
+    to_station: str = Query(..., description="Destination station code", example="BCT"),
+    hours: int = Query(24, description="Time window in hours", ge=1, le=72),
+):
+    return await _search_trains_response(from_station, to_station, hours)
+
+async def _search_trains_response(from_station: str, to_station: str, hours: int):
     try:
-        result = search_trains.invoke({
-            "from_station": request.from_station,
-            "to_station": request.to_station,
-            "hours": request.hours
-        })
-        return result
+        # Blocking on a cache miss (upstream request); keep it off the event loop
+        body = await asyncio.to_thread(search_trains_json, from_station, to_station, hours)
+        # Set here so POST responses carry a validator and reuse the compressed body
+        return FastJSONResponse(content=body, headers={"ETag": content_etag(body)})
         
     except Exception as e:
         logger.error(f"Error in direct train search: {str(e)}")
@@ -64,6 +187,117 @@ async def search_trains_direct(request: DirectTrainRequest):
             "error": str(e)
         }
 
+@router.get("/availability",
+            summary="Query Seat Availability",
+            description="Filter seat availability by class, quota, status and fare across cached train searches")
+async def get_availability(
+    from_station: Optional[str] = Query(None, description="Source station code", example="NDLS"),
+    to_station: Optional[str] = Query(None, description="Destination station code", example="BCT"),
+    hours: int = Query(24, description="Time window the route was searched with", ge=1, le=72),
+    travel_class: Optional[str] = Query(None, description="Travel class code", example="3A"),
+    quota: Optional[Literal["general", "tatkal"]] = Query(None, description="Booking quota"),
+    status: Optional[List[Literal["available", "rac", "waitlist", "regret", "not_available", "unknown"]]] = Query(None, description="Availability status; repeat for several"),
+    max_fare: Optional[float] = Query(None, description="Maximum fare", gt=0),
+    min_prediction: Optional[float] = Query(None, description="Minimum confirmation chance (%) for RAC/waitlist", ge=0, le=100),
+    limit: int = Query(50, description="Maximum number of results", ge=1, le=500),
+):
+    """
+    Answer availability questions from already cached searches
+
+    No upstream call is made. Omit the stations to query every cached route;
+    for a route that has not been searched yet `route_cached` is false and
+    the result is empty, so call /trains/search first.
+    """
+    if bool(from_station) != bool(to_station):
+        raise AppException("Provide both from_station and to_station, or neither", status_code=422)
+    # Reads the shared cache and scans the index; keep it off the event loop
+    return await asyncio.to_thread(
+        query_availability,
+        from_station, to_station, hours,
+        travel_class=travel_class,
+        quota=quota,
+        statuses=status,
+        max_fare=max_fare,
+        min_prediction=min_prediction,
+        limit=limit,
+    )
+
+@router.websocket("/live/{from_station}/{to_station}")
+async def live_board_websocket(
+    websocket: WebSocket,
+    from_station: str,
+    to_station: str,
+    hours: int = Query(1, ge=1, le=8),
+):
+    """
+    Live departures between two stations: a snapshot, then JSON deltas
+    (`added`, `updated`, `removed`) as the upstream board changes
+    """
+    try:
+        live_board.check_route(from_station, to_station, hours)
+    except AppException as e:
+        # 1008: policy violation (bad codes), 1013: try again later (at capacity)
+        await websocket.close(code=1013 if e.status_code == 429 else 1008, reason=e.message)
+        return
+    await websocket.accept()
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    disconnected = asyncio.create_task(wait_for_disconnect())
+    try:
+        async with live_board.subscribe(from_station, to_station, hours) as queue:
+            while True:
+                next_message = asyncio.create_task(queue.get())
+                await asyncio.wait({next_message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    next_message.cancel()
+                    break
+                await websocket.send_text(dumps(next_message.result()).decode("utf-8"))
+    finally:
+        disconnected.cancel()
+
+@router.get("/live/{from_station}/{to_station}/events",
+            summary="Live Station Board (SSE)",
+            description="Server-sent events with a board snapshot followed by deltas")
+async def live_board_events(
+    from_station: str,
+    to_station: str,
+    hours: int = Query(1, description="Look-ahead window in hours", ge=1, le=8),
+):
+    """
+    Same stream as the /live WebSocket, as `text/event-stream`
+
+    Event types are `snapshot`, `delta` and `error`; idle periods carry a
+    keep-alive comment.
+    """
+    # Checked before streaming so bad codes and a full board get a proper
+    # status; subscribe() checks again
+    live_board.check_route(from_station, to_station, hours)
+
+    async def events():
+        async with live_board.subscribe(from_station, to_station, hours) as queue:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.LIVE_BOARD_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {dumps(message).decode('utf-8')}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/live",
+            summary="Live Board Status",
+            description="Routes currently polled for live boards and their subscriber counts")
+async def live_board_status():
+    return {"success": True, "routes": live_board.stats()}
+
 @router.get("/stations/search",
             summary="Search Station Codes",
             description="Find station codes by city or station name")
@@ -76,7 +310,7 @@ async def search_stations(
     Useful for finding the correct station code before using /trains/search
     """
     try:
-        result = search_station_code.invoke({"station_name": query})
+        result = await asyncio.to_thread(search_station_code, query)
         return result
         
     except Exception as e:
@@ -97,7 +331,7 @@ async def get_workflow_visualization():
     """
     return {
         "success": True,
-        "workflow": agent.get_graph_visualization()
+        "workflow": WORKFLOW_DESCRIPTION
     }
 
 @router.get("/health",
@@ -117,6 +351,71 @@ async def health_check():
         ]
     }
 
+@router.get("/ready",
+            summary="Readiness Check",
+            description="Check if this worker is ready to serve trip planning requests")
+async def readiness_check():
+    """
+    Readiness probe, separate from /health (liveness)
+
+    Returns 503 until the agent has warmed up, and again once the worker
+    starts draining for shutdown.
+    """
+    ready = lifecycle.is_ready()
+    return FastJSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "draining": lifecycle.draining,
+            "in_flight_requests": lifecycle.in_flight.count,
+        },
+    )
+
+@router.get("/metrics",
+            summary="Metrics",
+            description="In-process counters such as LLM calls and token usage")
+async def get_metrics():
+    """Metrics for this worker process"""
+    return metrics.snapshot()
+
+def _require_admin(request: Request):
+    if not is_admin(request.headers):
+        raise AppException("Admin token required", status_code=403)
+
+@router.get("/profiles",
+            summary="List Profiles",
+            description="Request profiles captured on this host (admin only)")
+async def list_profiles(request: Request):
+    """Most recent profiles first; send X-Profile: 1 with X-Admin-Token to capture one"""
+    _require_admin(request)
+    return {"success": True, "profiles": profile_store.list()}
+
+@router.get("/profiles/{profile_id}",
+            summary="Profile Summary",
+            description="Top functions of a captured profile (admin only)")
+async def get_profile(
+    request: Request,
+    profile_id: str,
+    sort_by: Literal["cumulative", "tottime", "calls"] = Query("cumulative", description="pstats sort key"),
+    limit: int = Query(40, description="Number of functions to show", ge=1, le=500),
+):
+    """pstats text report for the profile id returned in X-Profile-ID"""
+    _require_admin(request)
+    summary = profile_store.summary(profile_id, sort_by=sort_by, limit=limit)
+    if summary is None:
+        raise AppException("Profile not found", status_code=404)
+    return {"success": True, "profile": profile_store.metadata(profile_id), "summary": summary}
+
+@router.get("/profiles/{profile_id}/download",
+            summary="Download Profile",
+            description="Raw pstats file for snakeviz or pstats (admin only)")
+async def download_profile(request: Request, profile_id: str):
+    _require_admin(request)
+    path = profile_store.stats_path(profile_id)
+    if path is None:
+        raise AppException("Profile not found", status_code=404)
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
 @router.get("/",
             summary="API Info",
             description="Get information about the API")
@@ -129,7 +428,11 @@ async def root():
         "description": "Intelligent train travel planning powered by Google Gemini",
         "endpoints": {
             "main": "/api/v1/plan-trip",
+            "jobs": "/api/v1/jobs/plan-trip",
+            "conversation": "/api/v1/conversation",
             "direct_search": "/api/v1/trains/search",
+            "availability": "/api/v1/availability",
+            "live_board": "/api/v1/live/{from_station}/{to_station}",
             "station_search": "/api/v1/stations/search",
             "workflow": "/api/v1/workflow/visualization",
             "docs": "/docs"
@@ -7,9 +7,9 @@ WORKFLOW_DESCRIPTION = """
                     ↓
                 [Validate Locations] → Get station codes
                     ↓f
-                [Fetch Trains] → Query IRCTC API
+                [Fetch Trains] → Query all transport providers at once (both legs for round trips)
                     ↓
-                [Analyze Trains] → Filter by preferences
+                [Analyze Trains] → Filter by preferences, pair onward/return legs
                     ↓
                 [Generate Recommendations] → AI analysis
                     ↓
@@ -0,0 +1,210 @@
+# Offline gazetteer used to resolve places without a mapped station.
+# Coordinates are (latitude, longitude) in decimal degrees.
+
+# Major junctions and terminals: code -> (city, latitude, longitude)
+STATION_COORDINATES = {
+    # North
+    "NDLS": ("new delhi", 28.642, 77.219),
+    "YJUD": ("yamunanagar", 30.166, 77.285),
+    "GZB": ("ghaziabad", 28.650, 77.427),
+    "FDB": ("faridabad", 28.411, 77.310),
+    "GGN": ("gurgaon", 28.488, 77.012),
+    "RE": ("rewari", 28.196, 76.615),
+    "MTC": ("meerut", 28.990, 77.700),
+    "SRE": ("saharanpur", 29.960, 77.550),
+    "HW": ("haridwar", 29.948, 78.160),
+    "DDN": ("dehradun", 30.316, 78.034),
+    "KGM": ("kathgodam", 29.266, 79.545),
+    "MB": ("moradabad", 28.832, 78.778),
+    "BE": ("bareilly", 28.350, 79.420),
+    "ALJN": ("aligarh", 27.884, 78.082),
+    "MTJ": ("mathura", 27.481, 77.679),
+    "AGC": ("agra", 27.158, 77.990),
+    "TDL": ("tundla", 27.206, 78.236),
+    "CNB": ("kanpur", 26.454, 80.351),
+    "LKO": ("lucknow", 26.832, 80.923),
+    "PRYJ": ("prayagraj", 25.446, 81.826),
+    "BSB": ("varanasi", 25.327, 82.987),
+    "DDU": ("mughalsarai", 25.281, 83.120),
+    "GKP": ("gorakhpur", 26.759, 83.370),
+    "UMB": ("ambala", 30.339, 76.838),
+    "CDG": ("chandigarh", 30.669, 76.822),
+    "LDH": ("ludhiana", 30.912, 75.846),
+    "JUC": ("jalandhar", 31.325, 75.578),
+    "ASR": ("amritsar", 31.633, 74.867),
+    "BTI": ("bathinda", 30.205, 74.944),
+    "FZR": ("firozpur", 30.915, 74.600),
+    "HSX": ("hisar", 29.155, 75.722),
+    "PTK": ("pathankot", 32.270, 75.645),
+    "JAT": ("jammu", 32.706, 74.878),
+    "SVDK": ("katra", 32.975, 74.920),
+    # West
+    "BCT": ("mumbai", 18.969, 72.819),
+    "CSMT": ("mumbai cst", 18.940, 72.835),
+    "KYN": ("kalyan", 19.236, 73.131),
+    "PUNE": ("pune", 18.529, 73.874),
+    "NK": ("nashik", 19.947, 73.842),
+    "MMR": ("manmad", 20.252, 74.437),
+    "AWB": ("aurangabad", 19.862, 75.313),
+    "BSL": ("bhusaval", 21.046, 75.788),
+    "SUR": ("solapur", 17.664, 75.893),
+    "KOP": ("kolhapur", 16.703, 74.240),
+    "MAO": ("madgaon", 15.266, 73.969),
+    "ST": ("surat", 21.205, 72.841),
+    "BRC": ("vadodara", 22.311, 73.181),
+    "ADI": ("ahmedabad", 23.026, 72.601),
+    "RJT": ("rajkot", 22.292, 70.804),
+    "JAM": ("jamnagar", 22.470, 70.060),
+    "BVC": ("bhavnagar", 21.771, 72.144),
+    "JP": ("jaipur", 26.920, 75.787),
+    "AII": ("ajmer", 26.457, 74.637),
+    "JU": ("jodhpur", 26.284, 73.023),
+    "UDZ": ("udaipur", 24.565, 73.700),
+    "BKN": ("bikaner", 28.016, 73.315),
+    "KOTA": ("kota", 25.225, 75.883),
+    "SWM": ("sawai madhopur", 26.000, 76.354),
+    # Central
+    "BPL": ("bhopal", 23.268, 77.413),
+    "ET": ("itarsi", 22.612, 77.762),
+    "JBP": ("jabalpur", 23.166, 79.951),
+    "KTE": ("katni", 23.833, 80.394),
+    "STA": ("satna", 24.577, 80.832),
+    "INDB": ("indore", 22.717, 75.868),
+    "UJN": ("ujjain", 23.182, 75.781),
+    "RTM": ("ratlam", 23.343, 75.045),
+    "GWL": ("gwalior", 26.216, 78.183),
+    "JHS": ("jhansi", 25.446, 78.570),
+    "NGP": ("nagpur", 21.152, 79.088),
+    "WR": ("wardha", 20.737, 78.602),
+    "BD": ("badnera", 20.857, 77.730),
+    "AK": ("akola", 20.709, 77.006),
+    "BPQ": ("balharshah", 19.850, 79.345),
+    "G": ("gondia", 21.460, 80.193),
+    "R": ("raipur", 21.254, 81.632),
+    "DURG": ("durg", 21.184, 81.282),
+    "BSP": ("bilaspur", 22.088, 82.141),
+    # East and North-East
+    "HWH": ("howrah", 22.584, 88.342),
+    "SDAH": ("kolkata", 22.568, 88.370),
+    "KGP": ("kharagpur", 22.339, 87.325),
+    "ASN": ("asansol", 23.691, 86.976),
+    "DHN": ("dhanbad", 23.792, 86.429),
+    "RNC": ("ranchi", 23.346, 85.335),
+    "TATA": ("jamshedpur", 22.769, 86.201),
+    "GAYA": ("gaya", 24.802, 84.999),
+    "PNBE": ("patna", 25.603, 85.137),
+    "CPR": ("chhapra", 25.784, 84.725),
+    "MFP": ("muzaffarpur", 26.117, 85.383),
+    "DBG": ("darbhanga", 26.153, 85.897),
+    "BGP": ("bhagalpur", 25.244, 86.980),
+    "NJP": ("siliguri", 26.683, 88.444),
+    "GHY": ("guwahati", 26.182, 91.751),
+    "LMG": ("lumding", 25.750, 93.170),
+    "DMV": ("dimapur", 25.906, 93.727),
+    "DBRG": ("dibrugarh", 27.467, 94.911),
+    "BLS": ("balasore", 21.494, 86.933),
+    "CTC": ("cuttack", 20.464, 85.879),
+    "BBS": ("bhubaneswar", 20.267, 85.843),
+    "KUR": ("khurda road", 20.183, 85.617),
+    "PURI": ("puri", 19.810, 85.828),
+    "SBP": ("sambalpur", 21.461, 83.967),
+    "BAM": ("brahmapur", 19.303, 84.782),
+    # South
+    "VZM": ("vizianagaram", 18.116, 83.405),
+    "VSKP": ("visakhapatnam", 17.722, 83.290),
+    "RJY": ("rajahmundry", 17.000, 81.780),
+    "BZA": ("vijayawada", 16.518, 80.619),
+    "GNT": ("guntur", 16.300, 80.450),
+    "WL": ("warangal", 17.971, 79.600),
+    "SC": ("secunderabad", 17.434, 78.502),
+    "HYB": ("hyderabad", 17.392, 78.468),
+    "KRNT": ("kurnool", 15.830, 78.040),
+    "GTL": ("guntakal", 15.170, 77.370),
+    "WADI": ("wadi", 17.056, 76.991),
+    "TPTY": ("tirupati", 13.628, 79.419),
+    "MAS": ("chennai", 13.083, 80.275),
+    "KPD": ("katpadi", 12.972, 79.138),
+    "JTJ": ("jolarpettai", 12.566, 78.576),
+    "VM": ("villupuram", 11.941, 79.491),
+    "SA": ("salem", 11.671, 78.113),
+    "ED": ("erode", 11.334, 77.727),
+    "CBE": ("coimbatore", 10.996, 76.967),
+    "TPJ": ("tiruchirappalli", 10.795, 78.686),
+    "MDU": ("madurai", 9.919, 78.111),
+    "TEN": ("tirunelveli", 8.727, 77.685),
+    "CAPE": ("kanniyakumari", 8.090, 77.545),
+    "TVC": ("thiruvananthapuram", 8.487, 76.952),
+    "QLN": ("kollam", 8.886, 76.595),
+    "ERS": ("kochi", 9.969, 76.290),
+    "TCR": ("thrissur", 10.515, 76.209),
+    "SRR": ("shoranur", 10.760, 76.273),
+    "CLT": ("kozhikode", 11.247, 75.780),
+    "MAQ": ("mangaluru", 12.864, 74.842),
+    "SBC": ("bengaluru", 12.978, 77.570),
+    "YPR": ("yesvantpur", 13.023, 77.550),
+    "MYS": ("mysuru", 12.316, 76.646),
+    "ASK": ("arsikere", 13.314, 76.257),
+    "DVG": ("davangere", 14.466, 75.922),
+    "UBL": ("hubballi", 15.351, 75.149),
+    "BGM": ("belagavi", 15.848, 74.501),
+}
+
+# Towns and localities without a station in the table above: name -> (latitude, longitude)
+PLACE_COORDINATES = {
+    "noida": (28.535, 77.391),
+    "greater noida": (28.474, 77.504),
+    "gurugram": (28.459, 77.027),
+    "mohali": (30.704, 76.717),
+    "panchkula": (30.694, 76.861),
+    "shimla": (31.105, 77.173),
+    "kasauli": (30.899, 76.965),
+    "manali": (32.240, 77.190),
+    "dharamshala": (32.219, 76.323),
+    "srinagar": (34.084, 74.797),
+    "leh": (34.152, 77.577),
+    "rishikesh": (30.087, 78.268),
+    "mussoorie": (30.459, 78.066),
+    "nainital": (29.380, 79.463),
+    "vrindavan": (27.580, 77.700),
+    "ayodhya": (26.790, 82.200),
+    "khajuraho": (24.852, 79.934),
+    "sanchi": (23.481, 77.736),
+    "bodh gaya": (24.695, 84.991),
+    "darjeeling": (27.041, 88.266),
+    "gangtok": (27.338, 88.606),
+    "shillong": (25.578, 91.893),
+    "navi mumbai": (19.033, 73.030),
+    "thane": (19.218, 72.978),
+    "alibaug": (18.641, 72.872),
+    "lonavala": (18.754, 73.405),
+    "mahabaleshwar": (17.925, 73.657),
+    "shirdi": (19.766, 74.477),
+    "panaji": (15.490, 73.827),
+    "gandhinagar": (23.215, 72.637),
+    "bhuj": (23.242, 69.666),
+    "dwarka": (22.238, 68.968),
+    "somnath": (20.888, 70.401),
+    "diu": (20.714, 70.982),
+    "mount abu": (24.593, 72.708),
+    "pushkar": (26.490, 74.551),
+    "jaisalmer": (26.915, 70.908),
+    "puducherry": (11.934, 79.830),
+    "pondicherry": (11.934, 79.830),
+    "mahabalipuram": (12.627, 80.193),
+    "kanchipuram": (12.834, 79.703),
+    "ooty": (11.410, 76.695),
+    "kodaikanal": (10.238, 77.489),
+    "munnar": (10.089, 77.060),
+    "alappuzha": (9.498, 76.339),
+    "alleppey": (9.498, 76.339),
+    "varkala": (8.734, 76.716),
+    "kovalam": (8.400, 76.978),
+    "madikeri": (12.424, 75.739),
+    "coorg": (12.424, 75.739),
+    "chikmagalur": (13.316, 75.772),
+    "udupi": (13.341, 74.747),
+    "hampi": (15.335, 76.460),
+    "whitefield": (12.970, 77.750),
+    "electronic city": (12.845, 77.660),
+    "amaravati": (16.573, 80.358),
+}
@@ -8,6 +8,54 @@ TRAVEL_INTENT_PROMPT = """
         - time_preference: morning/afternoon/evening/night/any
         - budget_preference: budget/standard/premium/any
         - direct_only: true if user wants only direct routes
+        - return_date: date of the return journey for a round trip (or null for one way)
+        - return_time_preference: morning/afternoon/evening/night/any for the return journey (or null)
 
         Return ONLY valid JSON, no markdown or extra text.
 """
+
+FOLLOW_UP_INTENT_PROMPT = """
+        You update a travel intent from a follow-up message in an ongoing conversation.
+
+        You receive the current intent as JSON and the user's follow-up message.
+        Return the complete updated intent with the same fields:
+        from_location, to_location, travel_date, time_preference, budget_preference, direct_only,
+        return_date, return_time_preference.
+        Keep every value the user did not change.
+
+        Return ONLY valid JSON, no markdown or extra text.
+"""
+
+RECOMMENDATION_SYSTEM_PROMPT = (
+    "You are an Indian Railways travel advisor. From the candidate trains, recommend the top 3 "
+    "with brief pros and cons, then name the best overall choice. Weigh departure/arrival times, "
+    "duration, fare and seat availability against the user's preferences. Rows whose name starts with "
+    "a mode (bus:, flight:) are not trains. Be concise and practical."
+)
+
+RECOMMENDATION_USER_PROMPT = (
+    "Route: {from_location} ({from_code}) -> {to_location} ({to_code}); "
+    "time: {time_pref}; budget: {budget_pref}\n"
+    "Trains (#|no|name|dep|arr|dur|class:status fare conf%):\n"
+    "{trains_data}"
+)
+
+ROUND_TRIP_SYSTEM_PROMPT = (
+    "You are an Indian Railways travel advisor planning a round trip. From the candidate onward "
+    "and return trains and their pairings, recommend the top 3 pairings with brief pros and cons, "
+    "then name the best overall choice. Weigh time at the destination and total fare together with "
+    "departure/arrival times, duration and seat availability on both legs. Rows whose name starts with "
+    "a mode (bus:, flight:) are not trains. Be concise and practical."
+)
+
+ROUND_TRIP_USER_PROMPT = (
+    "Round trip: {from_location} ({from_code}) <-> {to_location} ({to_code}); "
+    "out: {travel_date}, back: {return_date}; time: {time_pref} out, {return_time_pref} back; "
+    "budget: {budget_pref}\n"
+    "Onward trains (#|no|name|dep|arr|dur|class:status fare conf%):\n"
+    "{onward_data}\n"
+    "Return trains (same columns):\n"
+    "{return_data}\n"
+    "Pairings (onward+return|total fare|hours at destination):\n"
+    "{pairs_data}"
+)
@@ -0,0 +1,57 @@
+# Common city to station code mapping
+CITY_STATION_MAP = {
+    "delhi": "NDLS",
+    "new delhi": "NDLS",
+    "yamunanagar": "YJUD",
+    "mumbai": "BCT",
+    "bangalore": "SBC",
+    "bengaluru": "SBC",
+    "chennai": "MAS",
+    "hyderabad": "HYB",
+    "kolkata": "HWH",
+    "pune": "PUNE",
+    "ahmedabad": "ADI",
+    "jaipur": "JP",
+    "lucknow": "LKO",
+    "kanpur": "CNB",
+    "nagpur": "NGP",
+    "indore": "INDB",
+    "bhopal": "BPL",
+    "patna": "PNBE",
+    "agra": "AGC",
+    "varanasi": "BSB",
+    "surat": "ST",
+    "kochi": "ERS",
+    "coimbatore": "CBE",
+    "guwahati": "GHY",
+    "chandigarh": "CDG",
+    "thiruvananthapuram": "TVC",
+    "vijayawada": "BZA",
+    "visakhapatnam": "VSKP",
+    "bhubaneswar": "BBS",
+    "goa": "MAO",
+    "amritsar": "ASR"
+}
+
+# Metro cities whose pairs carry most of the traffic; used to seed the cache warmer
+METRO_CITIES = ["delhi", "mumbai", "bangalore", "chennai", "hyderabad", "kolkata"]
+
+# Station codes accepted without an upstream lookup: every mapped city plus
+# the major junctions and terminals users commonly type directly
+KNOWN_STATION_CODES = frozenset(CITY_STATION_MAP.values()) | frozenset({
+    "NDLS", "DLI", "NZM", "ANVT", "DEE", "DEC",
+    "BCT", "CSMT", "LTT", "MMCT", "DR", "BDTS", "PNVL", "TNA", "KYN",
+    "SBC", "YPR", "KSRB", "BNC", "SMVB",
+    "MAS", "MS", "TBM", "MSB",
+    "HYB", "SC", "KCG",
+    "HWH", "SDAH", "KOAA", "SHM",
+    "LJN", "CNB", "ALD", "PRYJ", "GKP", "BSB", "DDU", "MGS",
+    "PNBE", "RJPB", "DHN", "RNC", "TATA", "ASN", "NJP", "KGP",
+    "GHY", "DBRG", "BBS", "CTC", "PURI", "VSKP", "BZA", "GNT", "TPTY",
+    "MDU", "TPJ", "CBE", "ED", "SA", "ERS", "ERN", "TVC", "CLT", "MAQ", "MAJN", "MYS", "UBL",
+    "MAO", "VSG", "KRMI", "PUNE", "NGP", "BPL", "JBP", "INDB", "UJN", "RTM",
+    "ADI", "BRC", "ST", "RJT", "BVC", "JAM",
+    "JP", "AII", "JU", "UDZ", "BKN", "KOTA", "SWM",
+    "AGC", "GWL", "JHS", "MTJ", "HW", "DDN", "UMB", "CDG", "LDH", "JUC", "ASR", "JAT", "SVDK", "PTK",
+    "R", "BSP", "DURG",
+})
@@ -0,0 +1,312 @@
+"""
+Two-tier cache for upstream and LLM results.
+
+A small per-process LRU (``TTLCache``) sits in front of a SQLite store in WAL
+mode (``PersistentCache``) that every worker on the host shares, so restarts
+and freshly forked workers start warm.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.utils.serialization import dumps, loads
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_with_expiry(self, key: Any) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, expires_at)`` or None when missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self.get_with_expiry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        if expires_at is None:
+            expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Any):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get_with_expiry(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class PersistentCache:
+    """
+    SQLite-backed cache shared across processes, fronted by a ``TTLCache``.
+
+    Values must be JSON serialisable; ``get_bytes``/``set_bytes`` store
+    already-encoded bodies without another encode/decode pass. Connections are opened lazily, one per
+    thread, so importing this module costs nothing. Any SQLite failure degrades
+    to the in-process tier instead of failing the request.
+    """
+
+    # Run size-bounded eviction once every N writes instead of on each one
+    EVICT_EVERY = 50
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 5000,
+        front_max_entries: int = 512,
+        enabled: bool = True,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.front = TTLCache(max_entries=front_max_entries)
+        self._local = threading.local()
+        self._writes = 0
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.enabled:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_entries ("
+                        "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                        "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)")
+                    self._initialized = True
+            self._local.conn = conn
+            return conn
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache unavailable, using in-process cache only: {e}")
+            self.enabled = False
+            return None
+
+    @staticmethod
+    def make_key(namespace: str, *parts: Any) -> str:
+        return namespace + ":" + "|".join(str(p) for p in parts)
+
+    def get_with_expiry(self, namespace: str, *parts: Any, fresh: bool = False) -> Optional[Tuple[Any, float]]:
+        """
+        Return ``(value, expires_at)`` from the front or shared tier. ``fresh``
+        skips the front tier, for entries other workers update in place.
+        """
+        return self._get(self.make_key(namespace, *parts), decode=True, fresh=fresh)
+
+    def get_bytes(self, namespace: str, *parts: Any) -> Optional[bytes]:
+        """Return a raw body stored with ``set_bytes``"""
+        entry = self._get(self.make_key(namespace, *parts), decode=False)
+        return None if entry is None else entry[0]
+
+    def _get(self, key: str, decode: bool, fresh: bool = False) -> Optional[Tuple[Any, float]]:
+        if not fresh:
+            entry = self.front.get_with_expiry(key)
+            if entry is not None:
+                return entry
+
+        conn = self._connection()
+        if conn is None:
+            return self.front.get_with_expiry(key) if fresh else None
+        now = time.time()
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache read failed for {key}: {e}")
+            return None
+
+        value = loads(row[0]) if decode else bytes(row[0])
+        self.front.set(key, value, expires_at=row[1])
+        return value, row[1]
+
+    def expires_at(self, namespace: str, *parts: Any) -> Optional[float]:
+        """
+        Expiry of the shared entry, read past the front cache so refreshes made by
+        other workers are visible
+        """
+        key = self.make_key(namespace, *parts)
+        conn = self._connection()
+        if conn is None:
+            entry = self.front.get_with_expiry(key)
+            return None if entry is None else entry[1]
+        try:
+            row = conn.execute(
+                "SELECT expires_at FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache read failed for {key}: {e}")
+            return None
+        return None if row is None else row[0]
+
+    def keys(self, namespace: str) -> List[Tuple[List[str], float]]:
+        """
+        ``(parts, expires_at)`` of the live shared entries in a namespace, with
+        the parts as strings. Entries only in the front tier are not listed.
+        """
+        conn = self._connection()
+        if conn is None:
+            return []
+        prefix = namespace + ":"
+        try:
+            # A key range rather than LIKE, so the primary key index is used
+            rows = conn.execute(
+                "SELECT key, expires_at FROM cache_entries WHERE key >= ? AND key < ? AND expires_at > ?",
+                (prefix, namespace + chr(ord(":") + 1), time.time()),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache scan failed for {namespace}: {e}")
+            return []
+        return [(key[len(prefix):].split("|"), expires_at) for key, expires_at in rows]
+
+    def get(self, namespace: str, *parts: Any, default: Any = None, fresh: bool = False) -> Any:
+        entry = self.get_with_expiry(namespace, *parts, fresh=fresh)
+        return default if entry is None else entry[0]
+
+    def set(self, namespace: str, *parts: Any, value: Any, ttl: float):
+        key = self.make_key(namespace, *parts)
+        try:
+            encoded = dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Persistent cache cannot encode value for {key}: {e}")
+            return
+        self._set(key, value, encoded, ttl)
+
+    def add(self, namespace: str, *parts: Any, value: Any, ttl: float) -> bool:
+        """
+        Store ``value`` only if no live entry exists, atomically across workers.
+        Returns True when this call stored it.
+        """
+        key = self.make_key(namespace, *parts)
+        try:
+            encoded = dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Persistent cache cannot encode value for {key}: {e}")
+            return False
+        now = time.time()
+        expires_at = now + ttl
+
+        conn = self._connection()
+        if conn is None:
+            if key in self.front:
+                return False
+            self.front.set(key, value, expires_at=expires_at)
+            return True
+        try:
+            # An expired row no longer counts as present
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, encoded, expires_at, now),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache write failed for {key}: {e}")
+            return False
+        if cursor.rowcount != 1:
+            return False
+        self.front.set(key, value, expires_at=expires_at)
+        return True
+
+    def set_bytes(self, namespace: str, *parts: Any, value: bytes, ttl: Optional[float] = None,
+                  expires_at: Optional[float] = None):
+        """Store a raw body for ``ttl`` seconds, or until an absolute ``expires_at``"""
+        self._set(self.make_key(namespace, *parts), value, value, ttl, expires_at)
+
+    def _set(self, key: str, value: Any, encoded: bytes, ttl: Optional[float], expires_at: Optional[float] = None):
+        now = time.time()
+        if expires_at is None:
+            expires_at = now + ttl
+        self.front.set(key, value, expires_at=expires_at)
+
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, encoded, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache write failed for {key}: {e}")
+
+    def delete(self, namespace: str, *parts: Any):
+        key = self.make_key(namespace, *parts)
+        self.front.delete(key)
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache delete failed for {key}: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows, then the least recently used ones above the size bound"""
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+
+
+cache = PersistentCache(
+    path=settings.CACHE_DB_PATH,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    front_max_entries=settings.CACHE_FRONT_MAX_ENTRIES,
+    enabled=settings.CACHE_ENABLED,
+)
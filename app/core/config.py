@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -16,11 +17,110 @@ class Settings(BaseSettings):
 
     # Extra settings from .env
     LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    LOG_HOT_PATH_SAMPLE_RATE: float = 1.0
+    LOG_HOT_PATH_MAX_PER_INTERVAL: int = 20
+    LOG_HOT_PATH_INTERVAL_SECONDS: float = 1.0
     DEBUG: bool = False
     LLM_TEMPERATURE: float = 0.7
+
+    # LLM provider and per-role model tiering
+    LLM_PROVIDER: str = "gemini"  # gemini | fake
+    LLM_INTENT_PROVIDER: Optional[str] = None
+    LLM_INTENT_MODEL: str = "gemini-2.0-flash-lite"
+    LLM_INTENT_TEMPERATURE: float = 0.0
+    LLM_INTENT_MAX_TOKENS: int = 256
+    LLM_RECOMMENDATION_PROVIDER: Optional[str] = None
+    LLM_RECOMMENDATION_MODEL: str = "gemini-2.0-flash"
+    LLM_RECOMMENDATION_TEMPERATURE: Optional[float] = None  # defaults to LLM_TEMPERATURE
+    LLM_RECOMMENDATION_MAX_TOKENS: int = 1024
+    LLM_FAKE_LATENCY_SECONDS: float = 0.0
+    LLM_GEMINI_TRANSPORT: str = "grpc"  # grpc | rest
+    LLM_WARM_UP_CONNECTIONS: bool = True  # open LLM connections before /ready reports true
+    LLM_WARM_UP_TIMEOUT_SECONDS: float = 5.0
+    LLM_KEEPALIVE_INTERVAL_SECONDS: float = 240  # re-warm connections idle this long; 0 disables
+    RECOMMENDATION_MAX_PROMPT_TOKENS: int = 600
     MAX_TRAINS_TO_ANALYZE: int = 10
+    ROUND_TRIP_MAX_OPTIONS: int = 5  # onward/return pairings ranked for round trips
     TOOL_TIMEOUT_SECONDS: int = 15
     REQUEST_TIMEOUT_SECONDS: int = 30
+    NEAREST_STATION_CANDIDATES: int = 3  # junctions tried for places without a mapped station
+    NEAREST_STATION_MAX_DISTANCE_KM: float = 250.0
+
+    # Journey providers searched concurrently by the planner (providers/registry.py)
+    TRANSPORT_PROVIDERS: list = ["rail"]
+    PROVIDER_TIMEOUT_SECONDS: float = 15.0
+    PROVIDER_TIMEOUTS: dict = {}  # per-provider overrides, e.g. {"flight": 5}
+    PROVIDER_MAX_WORKERS: int = 16
+
+    # Persistent cache (shared by all workers on the host)
+    CACHE_ENABLED: bool = True
+    CACHE_DB_PATH: str = "cache/tripmate_cache.db"
+    CACHE_MAX_ENTRIES: int = 5000
+    CACHE_FRONT_MAX_ENTRIES: int = 512
+    TRAIN_SEARCH_CACHE_TTL_SECONDS: int = 300
+    STATION_CACHE_TTL_SECONDS: int = 86400
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    NEGATIVE_CACHE_TTL_SECONDS: int = 120  # empty searches and unknown places
+
+    # Background refresh of popular routes
+    CACHE_WARMER_ENABLED: bool = True
+    CACHE_WARMER_INTERVAL_SECONDS: int = 60
+    CACHE_WARMER_TOP_N: int = 10
+    CACHE_WARMER_REQUEST_BUDGET: int = 5
+    CACHE_WARMER_REFRESH_AHEAD_SECONDS: int = 90
+    CACHE_WARMER_JITTER_SECONDS: float = 5.0
+
+    # Conversation sessions
+    SESSION_TTL_SECONDS: int = 1800
+
+    # Graph checkpoints, so retries resume after the last successful node
+    CHECKPOINT_BACKEND: str = "sqlite"  # sqlite (shared by workers) | memory | none
+    CHECKPOINT_DB_PATH: str = "cache/checkpoints.db"
+    CHECKPOINT_TTL_SECONDS: int = 900
+    CHECKPOINT_MAX_THREADS: int = 2000
+
+    # Stored result sets for re-filtering
+    RESULT_STORE_TTL_SECONDS: int = 1800
+
+    # Response compression
+    COMPRESSION_MIN_SIZE_BYTES: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 256  # compressed bodies kept per ETag
+
+    # Production serving
+    WEB_CONCURRENCY: int = 0  # 0 = one worker per available core
+    WORKER_TIMEOUT_SECONDS: int = 120
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: int = 30
+
+    # Per-request profiling: X-Profile: 1 plus X-Admin-Token, or sampled
+    PROFILING_ENABLED: bool = True
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_ADMIN_TOKEN: Optional[str] = None
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 100
+
+    # Span tracing: sampled per request or forced with X-Trace: 1
+    TRACING_ENABLED: bool = True
+    TRACE_SAMPLE_RATE: float = 0.1
+    TRACE_EXPORTER: str = "file"  # file | log
+    TRACE_FILE: str = "traces/spans.jsonl"
+    TRACE_FILE_MAX_BYTES: int = 20 * 1024 * 1024
+
+    # Asynchronous plan-trip jobs
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_MAX_SIZE: int = 100
+    JOB_RESULT_TTL_SECONDS: int = 3600
+    JOB_WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    JOB_WEBHOOK_MAX_ATTEMPTS: int = 3
+
+    # Live station boards
+    LIVE_BOARD_POLL_INTERVAL_SECONDS: float = 30.0
+    LIVE_BOARD_SUBSCRIBER_QUEUE_SIZE: int = 32
+    LIVE_BOARD_HEARTBEAT_SECONDS: float = 15.0
+    LIVE_BOARD_MAX_ROUTES: int = 50  # distinct routes polled at once across all workers
+    LIVE_BOARD_FOLLOW_INTERVAL_SECONDS: float = 2.0  # how often non-polling workers read the shared board
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,53 @@
+"""
+Process lifecycle state: readiness (separate from liveness) and tracking of
+in-flight agent requests so shutdown can drain them gracefully.
+"""
+import threading
+from contextlib import contextmanager
+
+
+class InFlightTracker:
+    """Counts running requests; ``wait_idle`` blocks until none are left"""
+
+    def __init__(self):
+        self._count = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def track(self):
+        with self._condition:
+            self._count += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._count -= 1
+                if self._count == 0:
+                    self._condition.notify_all()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def wait_idle(self, timeout: float) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._count == 0, timeout=timeout)
+
+
+class Lifecycle:
+    def __init__(self):
+        self.in_flight = InFlightTracker()
+        self.draining = False
+        self._ready = threading.Event()
+
+    def mark_ready(self):
+        self._ready.set()
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set() and not self.draining
+
+    def start_draining(self):
+        self.draining = True
+
+
+lifecycle = Lifecycle()
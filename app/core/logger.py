@@ -1,23 +1,162 @@
+import atexit
+import copy
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
 import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from app.core.config import settings
+from app.utils.serialization import dumps
 
 # Logger configuration
-LOG_FORMAT = "%(levelname)s | %(asctime)s | %(name)s | %(message)s"
+LOG_FORMAT = "%(levelname)s | %(asctime)s | %(name)s | %(request_id)s | %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Correlation id of the request being handled; copied into every record
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class CorrelationIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return dumps(entry).decode("utf-8")
+
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    ``QueueHandler`` that keeps the traceback as ``exc_text`` instead of
+    folding it into the message, so the listener's formatters can place it
+    (``JsonFormatter`` emits it as its own field)
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback in the logging thread, as the
+        # stock handler does, but leave the layout to the listener's handlers
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class HotPathFilter(logging.Filter):
+    """
+    Samples and rate-limits high-frequency messages. Each message template gets
+    at most ``max_per_interval`` records per interval; the next record let
+    through reports how many were dropped.
+    """
+
+    def __init__(self, sample_rate: float, max_per_interval: int, interval_seconds: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_interval = max_per_interval
+        self.interval_seconds = interval_seconds
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._windows.get(record.msg, (now, 0, 0))
+            if now - window_start >= self.interval_seconds:
+                window_start, count = now, 0
+            if count >= self.max_per_interval:
+                self._windows[record.msg] = (window_start, count, suppressed + 1)
+                return False
+            self._windows[record.msg] = (window_start, count + 1, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} similar)"
+        return True
+
+
+def _build_formatter() -> logging.Formatter:
+    if settings.LOG_JSON:
+        return JsonFormatter()
+    return logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+
+
 logger = logging.getLogger("travel_app")
-logger.setLevel(logging.INFO)
+logger.setLevel(settings.LOG_LEVEL)
+
+# High-frequency request-path messages (per node, per search, per lookup)
+hot_logger = logger.getChild("hot")
+hot_logger.addFilter(HotPathFilter(
+    sample_rate=settings.LOG_HOT_PATH_SAMPLE_RATE,
+    max_per_interval=settings.LOG_HOT_PATH_MAX_PER_INTERVAL,
+    interval_seconds=settings.LOG_HOT_PATH_INTERVAL_SECONDS,
+))
 
 # Console Handler
 console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+console_handler.setFormatter(_build_formatter())
 
 # File Handler (rotating logs)
 file_handler = RotatingFileHandler("logs/app.log", maxBytes=5*1024*1024, backupCount=3)
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+file_handler.setFormatter(_build_formatter())
+
+# Request threads only enqueue records; a background listener does the I/O
+log_queue: queue.Queue = queue.Queue(-1)
+queue_handler = LogQueueHandler(log_queue)
+queue_handler.addFilter(CorrelationIdFilter())
+listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+
+
+def _restart_listener_after_fork():
+    """The listener thread does not survive fork; give each worker its own"""
+    global log_queue, listener
+    log_queue = queue.Queue(-1)
+    queue_handler.queue = log_queue
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+
+
+def stop_logging():
+    """Flush queued records; call on shutdown"""
+    try:
+        listener.stop()
+    except AttributeError:
+        pass  # already stopped
+
 
 # Attach handlers
 if not logger.handlers:
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
+    listener.start()
+    atexit.register(stop_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,52 @@
+"""
+In-process metrics: counters and value summaries keyed by name and labels.
+Cheap enough for the request path; exposed as JSON by the /metrics endpoint.
+"""
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Tuple
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Metrics:
+    def __init__(self):
+        self._counters: Dict[MetricKey, float] = defaultdict(float)
+        self._summaries: Dict[MetricKey, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels):
+        """Track count, sum, min and max of a value (latency, tokens, sizes)"""
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                self._summaries[key] = {"count": 1, "sum": value, "min": value, "max": value}
+                return
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+            summaries = [
+                {"name": name, "labels": dict(labels), **summary, "avg": summary["sum"] / summary["count"]}
+                for (name, labels), summary in self._summaries.items()
+            ]
+        return {"counters": counters, "summaries": summaries}
+
+
+metrics = Metrics()
@@ -1,8 +1,23 @@
 from fastapi import FastAPI, Request
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
-from app.core.logger import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.logger import logger, request_id_var
+from app.utils.responses import Response_handler
+from app.utils.serialization import dumps
+from typing import Optional
+from uuid import uuid4
+import gzip
+import hashlib
 import time
 
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
 def setup_middlewares(app: FastAPI):
     # CORS
     app.add_middleware(
@@ -21,3 +36,188 @@ def setup_middlewares(app: FastAPI):
         process_time = round(time.time() - start_time, 3)
         logger.info(f"{request.method} {request.url.path} - {response.status_code} [{process_time}s]")
         return response
+
+
+class RequestContextMiddleware:
+    """
+    Binds a correlation id to each request for logging. Uses the client's
+    ``X-Request-ID`` when present and echoes it on the response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["x-request-id"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+def content_etag(body: bytes) -> str:
+    """Strong validator for an encoded body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class ETagCompressionMiddleware:
+    """
+    Compresses JSON bodies above ``COMPRESSION_MIN_SIZE_BYTES`` with brotli
+    (when installed) or gzip, and handles ``If-None-Match``.
+
+    GET responses get content-hash ETags and matching requests a 304. Other
+    methods are only validated when the endpoint sets an ETag itself (bodies
+    that embed per-request ids would never match), and a match is answered
+    with 412 as RFC 9110 requires. Compressed bodies are kept per ETag, so
+    repeated cached responses are not compressed again. Non-JSON and
+    streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._compressed = TTLCache(max_entries=settings.COMPRESSION_CACHE_MAX_ENTRIES)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "POST"):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        headers = Headers(scope=scope)
+        if_none_match = headers.get("if-none-match")
+        encoding = _negotiate_encoding(headers.get("accept-encoding", ""))
+        start_message = None
+        chunks = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if start_message is None and message["type"] == "http.response.start":
+                response_headers = Headers(raw=message["headers"])
+                eligible = (
+                    message["status"] == 200
+                    and response_headers.get("content-type", "").startswith("application/json")
+                    and "content-encoding" not in response_headers
+                )
+                if eligible:
+                    start_message = message
+                    return
+                start_message = False
+                await send(message)
+                return
+
+            if not start_message or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_optimized(send, start_message, b"".join(chunks), method, if_none_match, encoding)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_optimized(self, send: Send, start_message: Message, body: bytes, method: str,
+                              if_none_match, encoding):
+        response_headers = MutableHeaders(raw=list(start_message["headers"]))
+        etag = response_headers.get("etag")
+        if etag is None and method == "GET":
+            etag = content_etag(body)
+        response_headers["vary"] = "Accept-Encoding"
+
+        compress = encoding is not None and len(body) >= settings.COMPRESSION_MIN_SIZE_BYTES
+        if etag is not None:
+            if compress:
+                # Each representation needs its own validator
+                etag = f'{etag[:-1]}-{encoding}"'
+            response_headers["etag"] = etag
+
+            if if_none_match and _etag_matches(if_none_match, etag):
+                if method == "GET":
+                    del response_headers["content-length"]
+                    if "content-type" in response_headers:
+                        del response_headers["content-type"]
+                    await send({"type": "http.response.start", "status": 304, "headers": response_headers.raw})
+                    await send({"type": "http.response.body", "body": b""})
+                    return
+                await self._send_precondition_failed(send)
+                return
+
+        if compress:
+            body = self._compress(body, encoding, etag)
+            response_headers["content-encoding"] = encoding
+
+        response_headers["content-length"] = str(len(body))
+        await send({"type": "http.response.start", "status": start_message["status"], "headers": response_headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+    def _compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        compressed = self._compressed.get(etag) if etag is not None else None
+        if compressed is not None:
+            return compressed
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+        if etag is not None:
+            self._compressed.set(etag, compressed)
+        return compressed
+
+    @staticmethod
+    async def _send_precondition_failed(send: Send):
+        body = dumps(Response_handler(success=False, message="If-None-Match matched the current representation"))
+        headers = MutableHeaders()
+        headers["content-type"] = "application/json"
+        headers["content-length"] = str(len(body))
+        await send({"type": "http.response.start", "status": 412, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compare ignoring weak prefixes and the per-encoding suffix"""
+    if if_none_match.strip() == "*":
+        return True
+    base = _base_etag(etag)
+    return any(_base_etag(candidate) == base for candidate in if_none_match.split(","))
+
+
+def _base_etag(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    etag = etag.strip('"')
+    for suffix in ("-br", "-gzip"):
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)]
+    return etag
@@ -0,0 +1,255 @@
+"""
+Opt-in per-request profiling.
+
+``ProfilingMiddleware`` marks a request for profiling when it carries
+``X-Profile: 1`` with the admin token, or is picked by
+``PROFILING_SAMPLE_RATE``. Agent calls made for a marked request run under
+cProfile (see ``services.agent_loader.run_agent``) and the result is written
+to ``PROFILE_DIR``.
+
+cProfile only sees the thread that enables it, while graph nodes, concurrent
+leg searches and provider calls run on pool threads. Those hops are wrapped
+with ``profiled``/``profile_thread``: while a request is profiled, each thread
+that works for it runs its own profiler, and all of them are merged into one
+profile when the call returns.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import logger, request_id_var
+
+# Set by the middleware for requests that should be profiled; holds the ids of
+# the profiles saved while handling the request
+profile_request_var: ContextVar[Optional[List[str]]] = ContextVar("profile_request", default=None)
+
+# The per-thread profilers of the agent call being profiled; copied into pool
+# threads with the rest of the context
+_thread_profiles_var: ContextVar[Optional["ThreadProfiles"]] = ContextVar("thread_profiles", default=None)
+
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_admin(headers: Headers) -> bool:
+    token = settings.PROFILING_ADMIN_TOKEN
+    return bool(token) and headers.get("x-admin-token") == token
+
+
+class ProfileStore:
+    """Profiles on local disk: ``<id>.prof`` (pstats) plus ``<id>.json`` metadata"""
+
+    def __init__(self, directory: str, max_profiles: int = 100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str, extension: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, profile_id: str, stats: pstats.Stats, metadata: Dict[str, Any]):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            stats.dump_stats(self._path(profile_id, "prof"))
+            with open(self._path(profile_id, "json"), "w") as f:
+                json.dump(metadata, f)
+            self._prune()
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                metadata = self.metadata(name[:-len(".json")])
+                if metadata is not None:
+                    profiles.append(metadata)
+        return sorted(profiles, key=lambda p: p.get("created_at", 0), reverse=True)
+
+    def metadata(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(profile_id, "json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (TypeError, OSError, ValueError):
+            return None
+
+    def stats_path(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, "prof")
+        return path if path and os.path.exists(path) else None
+
+    def summary(self, profile_id: str, sort_by: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """Human-readable top functions, as printed by pstats"""
+        path = self.stats_path(profile_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(path, stream=out)
+        stats.strip_dirs().sort_stats(sort_by).print_stats(limit)
+        return out.getvalue()
+
+    def _prune(self):
+        """Keep only the newest ``max_profiles`` profiles"""
+        profiles = self.list()
+        for stale in profiles[self.max_profiles:]:
+            for extension in ("prof", "json"):
+                try:
+                    os.remove(self._path(stale["profile_id"], extension))
+                except OSError:
+                    pass
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
+
+# cProfile cannot run two profilers at once on every Python version, so at
+# most one request is profiled at a time; others run unprofiled
+_profiler_lock = threading.Lock()
+
+
+class ThreadProfiles:
+    """Profilers of the threads working for one profiled call"""
+
+    def __init__(self):
+        self.profilers: List[cProfile.Profile] = []
+        self.closed = False
+        self._active: set = set()
+        self._lock = threading.Lock()
+
+    def claim(self, thread_id: int) -> bool:
+        """False when the thread is already profiled for this call, or the call has finished"""
+        with self._lock:
+            if self.closed or thread_id in self._active:
+                return False
+            self._active.add(thread_id)
+            return True
+
+    def release(self, thread_id: int, profiler: cProfile.Profile):
+        with self._lock:
+            self._active.discard(thread_id)
+            if not self.closed:
+                self.profilers.append(profiler)
+
+    def merge(self) -> pstats.Stats:
+        """Close the collection and merge what finished; threads still running are left out"""
+        with self._lock:
+            self.closed = True
+            profilers = list(self.profilers)
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+
+@contextmanager
+def profile_thread():
+    """Profile the current thread for the duration, when it works for a profiled call"""
+    thread_profiles = _thread_profiles_var.get()
+    thread_id = threading.get_ident()
+    if thread_profiles is None or not thread_profiles.claim(thread_id):
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        thread_profiles.release(thread_id, profiler)
+
+
+def profiled(func: Callable) -> Callable:
+    """Wrap ``func`` so calls on pool threads show up in the request's profile"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_thread():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def call_with_profiling(label: str, func: Callable, *args):
+    """Run ``func(*args)``, under cProfile when the current request asked for it"""
+    saved_profiles = profile_request_var.get()
+    if saved_profiles is None or not _profiler_lock.acquire(blocking=False):
+        return func(*args)
+
+    # Generated here rather than taken from X-Request-ID, which is client
+    # controlled and need not be unique or safe as a file name
+    profile_id = uuid.uuid4().hex
+    thread_profiles = ThreadProfiles()
+    token = _thread_profiles_var.set(thread_profiles)
+    start_time = time.time()
+    try:
+        with profile_thread():
+            return func(*args)
+    finally:
+        _thread_profiles_var.reset(token)
+        _profiler_lock.release()
+        duration = time.time() - start_time
+        try:
+            stats = thread_profiles.merge()
+            profile_store.save(profile_id, stats, {
+                "profile_id": profile_id,
+                "request_id": request_id_var.get(),
+                "label": label,
+                "created_at": start_time,
+                "duration_seconds": round(duration, 4),
+                "threads": len(thread_profiles.profilers),
+            })
+            saved_profiles.append(profile_id)
+            logger.info(f"Saved profile {profile_id} for {label} ({duration:.2f}s)")
+        except Exception as e:
+            # Profiling must never change the response
+            logger.warning(f"Could not save profile {profile_id}: {e}")
+
+
+class ProfilingMiddleware:
+    """
+    Decides per request whether to profile, and returns ``X-Profile-ID`` on
+    responses for which a profile was saved. Must run inside
+    ``RequestContextMiddleware`` so the request id is already bound.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        requested = headers.get("x-profile") == "1" and is_admin(headers)
+        sampled = settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+        if not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        saved_profiles: List[str] = []
+        token = profile_request_var.set(saved_profiles)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and saved_profiles:
+                MutableHeaders(scope=message)["x-profile-id"] = ",".join(saved_profiles)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile_request_var.reset(token)
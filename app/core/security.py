@@ -0,0 +1,56 @@
+"""
+Outbound URL checks for client-supplied callbacks (job webhooks), so the
+server cannot be pointed at itself or at hosts on its private network.
+"""
+import asyncio
+import ipaddress
+import socket
+from typing import Optional
+from urllib.parse import urlsplit
+
+ALLOWED_CALLBACK_SCHEMES = ("http", "https")
+_LOCAL_HOST_SUFFIXES = (".localhost", ".local", ".internal")
+
+
+def is_public_address(address: str) -> bool:
+    """True for globally routable addresses; private, loopback, link-local and reserved are not"""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def callback_url_error(url: str) -> Optional[str]:
+    """
+    Why ``url`` may not be used as a callback, from the URL alone (scheme and
+    literal host); None when it is acceptable. Host names are checked again
+    after resolution by ``resolves_to_public_host``.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ALLOWED_CALLBACK_SCHEMES:
+        return "must use http or https"
+    host = (parts.hostname or "").rstrip(".").lower()
+    if not host:
+        return "must include a host"
+    if host == "localhost" or host.endswith(_LOCAL_HOST_SUFFIXES):
+        return "must not point to a local host"
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return None
+    return None if is_public_address(host) else "must not point to a private or loopback address"
+
+
+async def resolves_to_public_host(url: str) -> bool:
+    """Resolve the callback host and require every address it maps to be public"""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError):
+        return False
+    addresses = {info[4][0] for info in infos}
+    return bool(addresses) and all(is_public_address(address) for address in addresses)
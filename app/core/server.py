@@ -0,0 +1,68 @@
+"""
+Production serve mode: gunicorn managing uvicorn workers.
+
+The app is imported and the agent graph compiled in the master before
+forking, so workers share it copy-on-write. Each worker then warms its own
+network clients in the lifespan and drains in-flight requests on shutdown.
+State that must survive a request landing on another worker (sessions,
+result sets, jobs, checkpoints) is kept in the shared SQLite files.
+"""
+import gc
+import os
+from typing import Optional
+
+from gunicorn.app.base import BaseApplication
+
+from app.core.config import settings
+from app.core.logger import logger
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects container CPU sets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class TripMateServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+        from services.agent_loader import preload_agent
+
+        preload_agent()
+        # Keep preloaded objects out of the collector so it does not touch
+        # (and un-share) their pages in the workers
+        gc.freeze()
+        logger.info("Application preloaded, forking workers")
+        return app
+
+
+def run_production(host: str = "0.0.0.0", port: int = 8000, workers: Optional[int] = None):
+    workers = workers or settings.WEB_CONCURRENCY or available_cores()
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": True,
+        # Give in-flight LLM requests time to finish before workers are killed
+        "graceful_timeout": settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS + 5,
+        "timeout": settings.WORKER_TIMEOUT_SECONDS,
+        "keepalive": 5,
+        "accesslog": "-",
+    }
+    if workers > 1 and (settings.CHECKPOINT_BACKEND == "memory" or not settings.CACHE_ENABLED):
+        # Sessions, result sets, jobs and checkpoints would then be visible
+        # only to the worker that created them
+        logger.warning("Running several workers without the shared SQLite cache and checkpoints; "
+                       "follow-up requests may not find state created by another worker")
+    logger.info(f"Starting production server on {host}:{port} with {workers} worker(s)")
+    TripMateServer(options).run()
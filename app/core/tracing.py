@@ -0,0 +1,294 @@
+"""
+Lightweight span tracing.
+
+``TracingMiddleware`` opens a root span per sampled request; ``start_span``
+opens child spans for graph nodes, rail API calls and LLM calls. The active
+span lives in a context variable, so it follows the request into
+``asyncio.to_thread`` workers. Finished traces are handed to a pluggable
+exporter (JSON lines in ``TRACE_FILE`` by default). When a request is not
+sampled every ``start_span`` returns a shared no-op span. Export happens on
+a background thread, so request handling never waits on trace I/O.
+"""
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import logger, request_id_var
+from app.utils.serialization import dumps
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_time", "end_time", "attributes", "status")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        self.end_time = time.time()
+        self.trace.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(((self.end_time or time.time()) - self.start_time) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class NoopSpan:
+    """Returned when the request is not sampled; every operation is free"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Trace:
+    """Spans of one request; exported together when the root span ends"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.root: Optional[Span] = None
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def finish(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+        if span is self.root:
+            # Only enqueued here; the export thread does the I/O
+            span_queue.put([s.to_dict() for s in self._spans])
+
+
+class SpanExporter(ABC):
+    """Receives the finished spans of one trace, on the export thread"""
+
+    @abstractmethod
+    def export(self, spans: List[Dict[str, Any]]):
+        ...
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends one JSON object per span to a local file, rotating it to
+    ``<path>.1`` once it grows past ``max_bytes``
+    """
+
+    def __init__(self, path: str, max_bytes: int = 20 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]):
+        payload = b"".join(dumps(span) + b"\n" for span in spans)
+        try:
+            with self._lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "ab") as f:
+                    f.write(payload)
+                    size = f.tell()
+                if size > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+        except OSError as e:
+            logger.warning(f"Could not export trace spans: {e}")
+
+
+class LogSpanExporter(SpanExporter):
+    """Writes one summary line per trace to the application log"""
+
+    def export(self, spans: List[Dict[str, Any]]):
+        breakdown = ", ".join(f"{s['name']}={s['duration_ms']:.1f}ms" for s in spans)
+        logger.info(f"Trace {spans[-1]['trace_id']}: {breakdown}")
+
+
+EXPORTERS = {
+    "file": lambda: FileSpanExporter(settings.TRACE_FILE, settings.TRACE_FILE_MAX_BYTES),
+    "log": LogSpanExporter,
+}
+
+exporter: SpanExporter = EXPORTERS.get(settings.TRACE_EXPORTER, EXPORTERS["file"])()
+
+
+def set_exporter(new_exporter: SpanExporter):
+    """Swap the exporter, e.g. for an OTLP bridge"""
+    global exporter
+    exporter = new_exporter
+
+
+# Finished traces wait here for the export thread, like log records for the
+# logging QueueListener; None tells the thread to stop
+span_queue: queue.Queue = queue.Queue(-1)
+_export_thread: Optional[threading.Thread] = None
+
+
+def _export_loop(pending: queue.Queue):
+    while True:
+        spans = pending.get()
+        if spans is None:
+            return
+        try:
+            exporter.export(spans)
+        except Exception as e:
+            logger.warning(f"Could not export trace spans: {e}")
+
+
+def _start_export_thread():
+    global _export_thread
+    _export_thread = threading.Thread(target=_export_loop, args=(span_queue,), name="span-exporter", daemon=True)
+    _export_thread.start()
+
+
+def _restart_export_thread_after_fork():
+    """The export thread does not survive fork; give each worker its own"""
+    global span_queue
+    span_queue = queue.Queue(-1)
+    _start_export_thread()
+
+
+def stop_tracing():
+    """Export queued traces; call on shutdown"""
+    if _export_thread is not None and _export_thread.is_alive():
+        span_queue.put(None)
+        _export_thread.join(timeout=5)
+
+
+_start_export_thread()
+atexit.register(stop_tracing)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_export_thread_after_fork)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span():
+    """The active span, or the no-op span outside a sampled request"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def should_sample(headers: Headers) -> bool:
+    if not settings.TRACING_ENABLED:
+        return False
+    if headers.get("x-trace") == "1":
+        return True
+    return settings.TRACE_SAMPLE_RATE >= 1.0 or random.random() < settings.TRACE_SAMPLE_RATE
+
+
+@contextmanager
+def start_trace(name: str, trace_id: str, **attributes) -> Iterator[Span]:
+    """Open the root span of a new trace and make it current"""
+    trace = Trace(trace_id)
+    span = Span(trace, name, None, attributes)
+    trace.root = span
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+@contextmanager
+def start_span(name: str, **attributes):
+    """Open a child of the current span; a no-op when the request is not traced"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    span = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def traced(name: str, func):
+    """Wrap ``func`` so each call runs in a span called ``name``"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with start_span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class TracingMiddleware:
+    """
+    Root span per sampled HTTP request, keyed by the request id. Sampled with
+    ``TRACE_SAMPLE_RATE`` or forced with ``X-Trace: 1``; the trace id is
+    echoed in ``X-Trace-ID``. Must run inside ``RequestContextMiddleware``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not should_sample(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = request_id_var.get()
+        with start_trace(f"{scope['method']} {scope['path']}", trace_id,
+                         http_method=scope["method"], http_path=scope["path"]) as span:
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http_status", message["status"])
+                    MutableHeaders(scope=message)["x-trace-id"] = trace_id
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
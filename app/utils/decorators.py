@@ -1,7 +1,6 @@
 import inspect
 import functools
-from fastapi.responses import JSONResponse
-from app.utils.responses import Response_handler
+from app.utils.responses import FastJSONResponse, Response_handler
 from app.core.logger import logger
 
 
@@ -22,9 +21,9 @@ def Response(success_message: str = "Success"):
 
                 # If already standardized, return directly
                 if isinstance(result, dict) and {"success", "message", "data"} <= result.keys():
-                    return JSONResponse(content=result)
+                    return FastJSONResponse(content=result)
 
-                return JSONResponse(
+                return FastJSONResponse(
                     content=Response_handler(True, success_message, result)
                 )
             except Exception as e:
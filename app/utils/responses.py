@@ -1,4 +1,19 @@
 from typing import Any, Optional
+from fastapi.responses import JSONResponse
+from app.utils.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when available. ``bytes`` content is
+    treated as an already-encoded body and sent as is.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
 
 def Response_handler(success: bool, message: str, data: Optional[Any] = None):
     return {
@@ -0,0 +1,115 @@
+"""
+First-request latency benchmark for /plan-trip.
+
+Each run starts the app in a fresh interpreter, waits for /ready, then times
+the first /plan-trip request and a second one with a different query (the
+warm steady state). Two configurations are compared:
+  - before: REST transport, no connection warm-up (the previous setup)
+  - after:  gRPC transport, LLM connections opened during warm-up
+
+Usage:
+    GOOGLE_API_KEY=... python benchmarks/first_request_benchmark.py [--runs 3] [--root PATH]
+
+``--root`` runs the app from another checkout, e.g. a git worktree of an
+older commit, to compare commits rather than configurations. Settings an
+older tree does not know are ignored there.
+
+The rail API is stubbed with a canned response and caches are disabled, so
+the difference is LLM client and connection setup. Without GOOGLE_API_KEY
+the offline fake model is used; that only checks the harness, as it opens no
+connections.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, time
+import main
+import tools.rail_tool as rail_tool
+
+class _Response:
+    status_code = 200
+    content = b'{"data": {"trainList": [{"trainNumber": "12951", "trainName": "MUMBAI RAJDHANI", "departureTime": "16:55", "arrivalTime": "08:35", "duration": 940, "avlClasses": ["3A"], "availabilityCache": {"3A": {"availability": "AVAILABLE-0042", "fare": "3000"}}}]}}'
+    def raise_for_status(self):
+        pass
+
+rail_tool.requests.get = lambda *args, **kwargs: _Response()
+
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    t0 = time.perf_counter()
+    while client.get("/api/v1/ready").status_code != 200:
+        time.sleep(0.01)
+    t_ready = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    client.post("/api/v1/plan-trip", json={"query": "Delhi to Mumbai tomorrow evening"})
+    t_first = time.perf_counter() - t1
+
+    t2 = time.perf_counter()
+    client.post("/api/v1/plan-trip", json={"query": "Delhi to Mumbai tomorrow morning"})
+    t_second = time.perf_counter() - t2
+
+# Written to a file rather than stdout, which log output also goes to
+with open(os.environ["BENCHMARK_RESULT_PATH"], "w") as f:
+    json.dump({"ready": t_ready, "first_request": t_first, "second_request": t_second}, f)
+"""
+
+CONFIGS = {
+    "before": {"LLM_GEMINI_TRANSPORT": "rest", "LLM_WARM_UP_CONNECTIONS": "false"},
+    "after": {"LLM_GEMINI_TRANSPORT": "grpc", "LLM_WARM_UP_CONNECTIONS": "true"},
+}
+
+
+def run_once(config: dict, root: str = ROOT) -> dict:
+    env = {
+        **os.environ,
+        "RAPIDAPI_KEY": os.environ.get("RAPIDAPI_KEY", "benchmark"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "benchmark"),
+        "CACHE_ENABLED": "false",
+        "CACHE_WARMER_ENABLED": "false",
+        "PYTHONWARNINGS": "ignore",
+        **config,
+    }
+    if "GOOGLE_API_KEY" not in os.environ:
+        env["LLM_PROVIDER"] = "fake"
+    with tempfile.TemporaryDirectory() as directory:
+        env["BENCHMARK_RESULT_PATH"] = os.path.join(directory, "result.json")
+        subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        with open(env["BENCHMARK_RESULT_PATH"]) as f:
+            return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--root", default=ROOT, help="checkout to run the app from")
+    args = parser.parse_args()
+
+    if "GOOGLE_API_KEY" not in os.environ:
+        print("GOOGLE_API_KEY is not set; using the fake model (no connections to warm)")
+
+    print(f"{'config':<8}{'metric':<16}{'median (ms)':>14}{'min (ms)':>12}{'max (ms)':>12}")
+    for name, config in CONFIGS.items():
+        runs = [run_once(config, args.root) for _ in range(args.runs)]
+        for metric in runs[0]:
+            values = [r[metric] * 1000 for r in runs]
+            print(f"{name:<8}{metric:<16}{statistics.median(values):>14.1f}{min(values):>12.1f}{max(values):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Concurrent provider fan-out benchmark for ``search_journeys``.
+
+Four stub providers are searched together:
+  - rail:   fast, 50 ms
+  - bus:    200 ms
+  - flight: 3 s, with a 0.5 s provider timeout (must be left behind)
+  - ferry:  fails immediately
+
+Each run checks that the search returns once the flight deadline passes
+(not after the 3 s flight), that rail and bus journeys are merged, and that
+flight and ferry are reported as timeout and error. The sequential cost
+(sum of latencies) is printed for comparison. Exits non-zero when a check
+fails.
+
+Usage:
+    python benchmarks/provider_fanout_benchmark.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from providers.base import ProviderError  # noqa: E402
+from providers.registry import search_journeys  # noqa: E402
+from providers.stub import StubProvider  # noqa: E402
+
+FLIGHT_TIMEOUT = 0.5
+
+
+def journey(number: str, departure: str, fare: float) -> dict:
+    return {
+        "train_number": number,
+        "train_name": f"SERVICE {number}",
+        "departure": {"time": departure},
+        "arrival": {"time": "23:00"},
+        "fare": fare,
+    }
+
+
+def unavailable(from_code: str, to_code: str):
+    raise ProviderError("ferry service unavailable")
+
+
+def build_providers():
+    return [
+        StubProvider("rail", "rail", [journey("12951", "16:55", 3000)], latency_seconds=0.05),
+        StubProvider("bus", "bus", [journey("BUS-7", "21:30", 1200)], latency_seconds=0.2),
+        StubProvider("flight", "flight", [journey("AI-887", "07:00", 5400)], latency_seconds=3.0,
+                     timeout=FLIGHT_TIMEOUT),
+        StubProvider("ferry", "ferry", unavailable),
+    ]
+
+
+def run_once(providers) -> float:
+    started = time.perf_counter()
+    result = search_journeys("NDLS", "BCT", providers=providers)
+    elapsed = time.perf_counter() - started
+
+    statuses = {name: status["status"] for name, status in result["providers"].items()}
+    modes = sorted(j["mode"] for j in result["journeys"])
+    expected = {"rail": "ok", "bus": "ok", "flight": "timeout", "ferry": "error"}
+    if statuses != expected:
+        raise AssertionError(f"unexpected provider statuses {statuses}")
+    if modes != ["bus", "rail"]:
+        raise AssertionError(f"unexpected merged journeys {modes}")
+    if not result["success"]:
+        raise AssertionError("search failed although rail and bus answered")
+    # Bounded by the flight deadline, with headroom for scheduling
+    if elapsed > FLIGHT_TIMEOUT + 0.25:
+        raise AssertionError(f"slow provider held the search back: {elapsed:.2f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    providers = build_providers()
+    sequential = sum(p.latency_seconds for p in providers)
+    try:
+        timings = [run_once(providers) * 1000 for _ in range(args.runs)]
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+
+    print(f"{'runs':<12}{args.runs}")
+    print(f"{'sequential':<12}{sequential * 1000:.0f} ms (sum of provider latencies)")
+    print(f"{'fan-out':<12}median {statistics.median(timings):.0f} ms, "
+          f"min {min(timings):.0f} ms, max {max(timings):.0f} ms")
+    print(f"{'deadline':<12}{FLIGHT_TIMEOUT * 1000:.0f} ms (flight timeout)")
+
+
+if __name__ == "__main__":
+    main()
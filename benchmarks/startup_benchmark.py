@@ -0,0 +1,100 @@
+"""
+Startup-time benchmark for the API process.
+
+Each measurement runs in a fresh interpreter so module caches do not hide
+import cost. Reports:
+  - import time of ``main`` (what every worker and test pays up front)
+  - time from process start to the first /health and /trains/search responses
+  - time until the agent (LangGraph + Gemini client) is ready
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5]
+
+The rail API is stubbed with a canned response so only local work is timed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, time
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter() - t0
+
+import tools.rail_tool as rail_tool
+
+class _Response:
+    status_code = 200
+    content = b'{"data": {"trainList": []}}'
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return {"data": {"trainList": []}}
+
+rail_tool.requests.get = lambda *args, **kwargs: _Response()
+
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+client.get("/api/v1/health")
+t_health = time.perf_counter() - t0
+client.post("/api/v1/trains/search", json={"from_station": "NDLS", "to_station": "BCT", "hours": 7})
+t_search = time.perf_counter() - t0
+
+from services.agent_loader import warm_up_agent
+warm_up_agent()
+t_agent = time.perf_counter() - t0
+
+# Written to a file rather than stdout, which log output also goes to
+with open(os.environ["BENCHMARK_RESULT_PATH"], "w") as f:
+    json.dump({
+        "import_main": t_import,
+        "first_health": t_health,
+        "first_search": t_search,
+        "agent_ready": t_agent,
+    }, f)
+"""
+
+
+def run_once() -> dict:
+    env = {
+        **os.environ,
+        "RAPIDAPI_KEY": os.environ.get("RAPIDAPI_KEY", "benchmark"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "benchmark"),
+        "CACHE_ENABLED": "false",
+        "PYTHONWARNINGS": "ignore",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        env["BENCHMARK_RESULT_PATH"] = os.path.join(directory, "result.json")
+        subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        with open(env["BENCHMARK_RESULT_PATH"]) as f:
+            return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"{'metric':<16}{'median (ms)':>14}{'min (ms)':>12}{'max (ms)':>12}")
+    for metric in runs[0]:
+        values = [r[metric] * 1000 for r in runs]
+        print(f"{metric:<16}{statistics.median(values):>14.1f}{min(values):>12.1f}{max(values):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Micro-benchmark for decoding train search payloads.
+
+Compares, per payload:
+  - legacy:  ``response.json()`` into dicts, then a response dict built for
+             every train before the list is cut to 15 (the previous code)
+  - generic: ``decode_train_search`` without msgspec (orjson/json parse,
+             dicts built only for the surviving trains)
+  - typed:   ``decode_train_search`` with msgspec (schema-driven, only the
+             surviving trains decoded); skipped when msgspec is missing
+
+Usage:
+    python benchmarks/train_decoder_benchmark.py [--trains 300] [--runs 200]
+    python benchmarks/train_decoder_benchmark.py --payload recorded.json [...]
+
+Without ``--payload`` a confirmtkt-shaped payload is generated, including
+the fields the decoder skips.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from tools import train_decoder  # noqa: E402
+
+LIMIT = 15
+CLASSES = ["1A", "2A", "3A", "3E", "SL", "CC", "2S"]
+
+
+def legacy_decode(body: bytes):
+    """The per-train dict building that search_trains used to do"""
+    data = json.loads(body)
+    trains = data.get("data", {}).get("trainList", [])
+    processed_trains = []
+    for train in trains:
+        availability_info = {}
+        for class_type in train.get("avlClasses", []):
+            general_quota = train.get("availabilityCache", {}).get(class_type, {})
+            tatkal_quota = train.get("availabilityCacheTatkal", {}).get(class_type, {})
+            availability_info[class_type] = {
+                "general": {
+                    "status": general_quota.get("availability", "NOT AVAILABLE"),
+                    "fare": general_quota.get("fare", "0"),
+                    "prediction": general_quota.get("prediction", "No prediction"),
+                    "prediction_percentage": general_quota.get("predictionPercentage", 0)
+                },
+                "tatkal": {
+                    "status": tatkal_quota.get("availability", "NOT AVAILABLE"),
+                    "fare": tatkal_quota.get("fare", "0")
+                }
+            }
+        processed_trains.append({
+            "train_number": train.get("trainNumber"),
+            "train_name": train.get("trainName"),
+            "from_station": {
+                "code": train.get("fromStnCode"),
+                "name": train.get("fromStnName"),
+                "city": train.get("fromCityName")
+            },
+            "to_station": {
+                "code": train.get("toStnCode"),
+                "name": train.get("toStnName"),
+                "city": train.get("toCityName")
+            },
+            "departure": {"time": train.get("departureTime"), "date": train.get("departureDate")},
+            "arrival": {"time": train.get("arrivalTime")},
+            "duration_mins": train.get("duration"),
+            "distance_km": train.get("distance"),
+            "available_classes": train.get("avlClasses", []),
+            "availability": availability_info,
+            "running_days": train.get("runningDays"),
+            "has_pantry": train.get("hasPantry", False),
+            "train_rating": train.get("trainRating")
+        })
+    return processed_trains[:LIMIT], len(processed_trains)
+
+
+def generic_decode(body: bytes):
+    return train_decoder._decode_generic(body, LIMIT)
+
+
+def typed_decode(body: bytes):
+    return train_decoder.decode_train_search(body, LIMIT)
+
+
+def _quota(rng: random.Random, tatkal: bool = False) -> dict:
+    quota = {
+        "availability": rng.choice(["AVAILABLE-0042", "GNWL23/WL12", "RAC 5", "REGRET", "NOT AVAILABLE"]),
+        "fare": str(rng.randint(200, 4500)),
+        "lastUpdated": "2025-01-01T10:00:00",
+        "availabilityDisplayName": "Available",
+        "cacheSource": "confirmtkt",
+        "quotaCode": "TQ" if tatkal else "GN",
+    }
+    if not tatkal:
+        quota.update(prediction="Confirm", predictionPercentage=str(rng.randint(10, 99)),
+                     confirmTktStatus="Probable", travelGuarantee=True)
+    return quota
+
+
+def synthetic_payload(trains: int, seed: int = 7) -> bytes:
+    """A confirmtkt-shaped payload, unused fields included"""
+    rng = random.Random(seed)
+    train_list = []
+    for i in range(trains):
+        classes = rng.sample(CLASSES, rng.randint(2, 5))
+        train_list.append({
+            "trainNumber": str(12000 + i),
+            "trainName": f"EXPRESS {i}",
+            "trainType": "SF",
+            "fromStnCode": "NDLS", "fromStnName": "New Delhi", "fromCityName": "Delhi",
+            "toStnCode": "BCT", "toStnName": "Mumbai Central", "toCityName": "Mumbai",
+            "departureTime": f"{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '30', '45'])}",
+            "arrivalTime": f"{rng.randint(0, 23):02d}:00",
+            "departureDate": "2025-01-01", "arrivalDate": "2025-01-02",
+            "duration": rng.randint(600, 1800), "distance": 1384,
+            "avlClasses": classes,
+            "availabilityCache": {c: _quota(rng) for c in classes},
+            "availabilityCacheTatkal": {c: _quota(rng, tatkal=True) for c in classes},
+            "runningDays": {d: rng.random() > 0.3 for d in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")},
+            "hasPantry": rng.random() > 0.5, "trainRating": round(rng.uniform(3, 5), 1),
+            "ratingCount": rng.randint(10, 5000),
+            "fromStnOrigin": rng.random() > 0.5, "toStnDestination": rng.random() > 0.5,
+            "stops": [{"code": f"S{j}", "arrival": "10:00", "departure": "10:05", "day": 1} for j in range(12)],
+            "classFares": {c: {"baseFare": rng.randint(100, 3000), "reservationCharge": 40,
+                               "superfastCharge": 45, "gst": 60} for c in classes},
+            "boardingStations": [{"code": "NDLS", "name": "New Delhi"}, {"code": "NZM", "name": "Nizamuddin"}],
+            "specialTrain": False, "isHoliday": False, "trainOwner": "IR",
+        })
+    return json.dumps({"data": {"trainList": train_list, "quota": "GN", "totalCount": trains}}).encode()
+
+
+def bench(func, body: bytes, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(body)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", action="append", help="recorded response body (repeatable)")
+    parser.add_argument("--trains", type=int, default=300, help="trains in the generated payload")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = {}
+    for path in args.payload or []:
+        with open(path, "rb") as f:
+            payloads[os.path.basename(path)] = f.read()
+    if not payloads:
+        payloads[f"synthetic-{args.trains}"] = synthetic_payload(args.trains)
+
+    decoders = {"legacy": legacy_decode, "generic": generic_decode}
+    if train_decoder.msgspec is not None:
+        decoders["typed"] = typed_decode
+    else:
+        print("msgspec is not installed; skipping the typed decoder")
+
+    print(f"{'payload':<20}{'KiB':>8}{'decoder':>10}{'median (us)':>14}{'p95 (us)':>12}{'speedup':>10}")
+    for name, body in payloads.items():
+        expected = legacy_decode(body)
+        for decoder_name, func in decoders.items():
+            assert func(body) == expected, f"{decoder_name} output differs from legacy on {name}"
+        baseline = None
+        for decoder_name, func in decoders.items():
+            func(body)  # warm up
+            timings = sorted(bench(func, body, args.runs))
+            median = statistics.median(timings)
+            baseline = baseline or median
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name:<20}{len(body) / 1024:>8.0f}{decoder_name:>10}{median:>14.0f}{p95:>12.0f}"
+                  f"{baseline / median:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.middleware import ETagCompressionMiddleware, RequestContextMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
 from app.core.logger import logger
+from services.agent_loader import keep_llm_connections_warm, warm_up_until_ready
+from services.cache_warmer import cache_warmer
+from services.job_queue import job_queue
+from services.live_board import live_board
+import argparse
+import asyncio
 from app.utils.exceptions import (
     AppException,
     app_exception_handler,
@@ -11,6 +22,53 @@ from app.utils.exceptions import (
     validation_exception_handler
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("=" * 70)
+    logger.info("TripMate AI Backend Starting...")
+    logger.info("=" * 70)
+    logger.info(f"Framework: LangChain + LangGraph + Google Gemini")
+    logger.info(f"API Version: {settings.API_V1_STR}")
+    logger.info(f"Environment: {'Development' if settings.DEBUG else 'Production'}")
+    logger.info("=" * 70)
+    logger.info("Features:")
+    logger.info("   LangGraph workflow engine")
+    logger.info("   Google Gemini AI integration")
+    logger.info("   LangChain tools for IRCTC API")
+    logger.info("   Intelligent intent extraction")
+    logger.info("   Multi-step agent reasoning")
+    logger.info("   Real-time train data")
+    logger.info("=" * 70)
+    cache_warmer.start()
+    job_queue.start()
+    # Load the LLM stack in the background; /health and /trains/search do not need it.
+    # /ready reports true once it is done.
+    warm_up_task = asyncio.create_task(warm_up_until_ready())
+    keepalive_task = None
+    if settings.LLM_KEEPALIVE_INTERVAL_SECONDS > 0:
+        keepalive_task = asyncio.create_task(keep_llm_connections_warm(settings.LLM_KEEPALIVE_INTERVAL_SECONDS))
+    logger.info("Server ready! Visit http://localhost:8000/docs for API documentation")
+
+    yield
+
+    logger.info("=" * 70)
+    logger.info("Backend shutting down...")
+    lifecycle.start_draining()
+    warm_up_task.cancel()
+    if keepalive_task is not None:
+        keepalive_task.cancel()
+    if lifecycle.in_flight.count:
+        logger.info(f"Draining {lifecycle.in_flight.count} in-flight request(s)...")
+    drained = await asyncio.to_thread(
+        lifecycle.in_flight.wait_idle, settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS
+    )
+    if not drained:
+        logger.warning(f"Shutdown with {lifecycle.in_flight.count} request(s) still in flight")
+    await live_board.stop()
+    await job_queue.stop(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await cache_warmer.stop()
+    logger.info("=" * 70)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="TripMate AI - Travel Planning API",
@@ -18,7 +76,8 @@ app = FastAPI(
     version="2.0.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -30,6 +89,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETags, 304s and compression for large JSON payloads
+app.add_middleware(ETagCompressionMiddleware)
+
+# Opt-in per-request profiling (inside the correlation id middleware)
+app.add_middleware(ProfilingMiddleware)
+
+# Sampled span tracing (inside the correlation id middleware)
+app.add_middleware(TracingMiddleware)
+
+# Correlation ids for logs (outermost, so every log line carries one)
+app.add_middleware(RequestContextMiddleware)
+
 # Exception handlers
 app.add_exception_handler(AppException, app_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -38,31 +109,6 @@ app.add_exception_handler(Exception, generic_exception_handler)
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("=" * 70)
-    logger.info("TripMate AI Backend Starting...")
-    logger.info("=" * 70)
-    logger.info(f"Framework: LangChain + LangGraph + Google Gemini")
-    logger.info(f"API Version: {settings.API_V1_STR}")
-    logger.info(f"Environment: {'Production' if not settings.API_V1_STR else 'Development'}")
-    logger.info("=" * 70)
-    logger.info("Features:")
-    logger.info("   LangGraph workflow engine")
-    logger.info("   Google Gemini AI integration")
-    logger.info("   LangChain tools for IRCTC API")
-    logger.info("   Intelligent intent extraction")
-    logger.info("   Multi-step agent reasoning")
-    logger.info("   Real-time train data")
-    logger.info("=" * 70)
-    logger.info("Server ready! Visit http://localhost:8000/docs for API documentation")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("=" * 70)
-    logger.info("Backend shutting down...")
-    logger.info("=" * 70)
-
 @app.get("/")
 async def root():
     return {
@@ -75,11 +121,22 @@ async def root():
     }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the TripMate AI backend")
+    parser.add_argument("--prod", action="store_true", help="Multi-worker production server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to the available CPU cores")
+    args = parser.parse_args()
+
+    if args.prod:
+        from app.core.server import run_production
+        run_production(host=args.host, port=args.port, workers=args.workers)
+    else:
+        import uvicorn
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="info"
+        )
@@ -0,0 +1,115 @@
+"""
+Deterministic offline chat model for benchmarks and local runs without an API
+key. Intent calls get a JSON intent parsed from the query with simple rules;
+recommendation calls get a short canned answer naming the first listed train.
+"""
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+TIME_PREFERENCES = ["morning", "afternoon", "evening", "night"]
+BUDGET_PREFERENCES = {"cheap": "budget", "budget": "budget", "premium": "premium", "luxury": "premium"}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_DAY = r"(today|tomorrow|" + "|".join(WEEKDAYS) + r")"
+_ROUTE_END = r"(?=\s+(?:on|tomorrow|today|in|by|at|this|next|and|back|" + "|".join(WEEKDAYS) + r")\b|[,.?!]|$)"
+RETURN_PATTERN = re.compile(r"\b(?:back|return(?:ing)?)\s+(?:on\s+|next\s+)?" + _DAY + r"\b")
+ROUTE_PATTERNS = [
+    re.compile(r"\bfrom\s+([a-z][a-z ]*?)\s+to\s+([a-z][a-z ]*?)" + _ROUTE_END),
+    re.compile(r"^\s*([a-z][a-z ]*?)\s+to\s+([a-z][a-z ]*?)" + _ROUTE_END),
+]
+
+
+class FakeChatModel(BaseChatModel):
+    role: str = "recommendation"
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        prompt = "\n".join(str(m.content) for m in messages)
+        user_text = str(messages[-1].content)
+        content = self._intent(user_text) if self.role == "intent" else self._recommendation(user_text)
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _intent(text: str) -> str:
+        intent = {
+            "from_location": None,
+            "to_location": None,
+            "travel_date": "today",
+            "time_preference": "any",
+            "budget_preference": "any",
+            "direct_only": False,
+            "return_date": None,
+            "return_time_preference": None,
+        }
+        current = re.search(r"Current intent: (\{.*\})", text)
+        if current:
+            intent.update(json.loads(current.group(1)))
+            text = text[current.end():]
+        # Drop the prompt's lead-in ("Extract intent from:", "Follow-up message:")
+        text = text.split(":", 1)[-1]
+
+        lowered = text.lower()
+        round_trip = RETURN_PATTERN.search(lowered)
+        if round_trip:
+            intent["return_date"] = round_trip.group(1)
+            intent["return_time_preference"] = next(
+                (p for p in TIME_PREFERENCES if p in lowered[round_trip.start():]), "any"
+            )
+            lowered = lowered[:round_trip.start()]
+        for pattern in ROUTE_PATTERNS:
+            route = pattern.search(lowered)
+            if route:
+                intent["from_location"] = route.group(1).strip().title()
+                intent["to_location"] = route.group(2).strip().title()
+                break
+        for preference in TIME_PREFERENCES:
+            if preference in lowered:
+                intent["time_preference"] = preference
+        for word, preference in BUDGET_PREFERENCES.items():
+            if word in lowered:
+                intent["budget_preference"] = preference
+        day = re.search(r"\b" + _DAY + r"\b", lowered)
+        if day:
+            intent["travel_date"] = day.group(1)
+        if "direct" in lowered:
+            intent["direct_only"] = True
+        return json.dumps(intent)
+
+    @staticmethod
+    def _recommendation(text: str) -> str:
+        match = re.search(r"^\s*1\s*[|:]\s*(.+)$", text, re.MULTILINE) or re.search(r"Train 1: (.+)", text)
+        best = match.group(1).strip() if match else "the first listed train"
+        return f"Best overall choice: {best}. It offers the best balance of timing and availability."
+
+
+def create_fake_chat_model(model: str, temperature: float, max_output_tokens: int, role: str = "recommendation"):
+    from app.core.config import settings
+
+    return FakeChatModel(role=role, latency_seconds=settings.LLM_FAKE_LATENCY_SECONDS)
@@ -1,12 +1,31 @@
-# import os
-# from langchain_google_genai import ChatGoogleGenerativeAI
-# from dotenv import load_dotenv
-
-# load_dotenv()
-
-# def get_gemini():
-#     return ChatGoogleGenerativeAI(
-#         model="gemini-1.5-pro",
-#         api_key=os.getenv("GEMINI_API_KEY"),
-#         temperature=0.4
-#     )
+from app.core.config import settings
+
+
+def create_gemini_chat_model(model: str, temperature: float, max_output_tokens: int):
+    """Google Gemini chat model; the SDK is imported only when a client is built"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        # "grpc" keeps one long-lived HTTP/2 channel per client for all calls
+        transport=settings.LLM_GEMINI_TRANSPORT,
+        google_api_key=settings.GOOGLE_API_KEY
+    )
+
+
+def warm_up_gemini_chat_model(chat_model):
+    """
+    Count the tokens of a short text: the call is free and goes over the
+    same channel as generation. Not retried, so an unreachable API cannot
+    hold up startup for longer than LLM_WARM_UP_TIMEOUT_SECONDS.
+    """
+    from google.ai.generativelanguage_v1beta.types import Content, Part
+
+    chat_model.client.count_tokens(
+        model=chat_model.model,
+        contents=[Content(parts=[Part(text="ping")])],
+        timeout=settings.LLM_WARM_UP_TIMEOUT_SECONDS,
+        retry=None,
+    )
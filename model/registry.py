@@ -0,0 +1,154 @@
+"""
+LLM provider registry. Each graph node asks for a model by role; the provider,
+model name, temperature and token limit for that role come from Settings, so
+intent extraction can use a small fast model while recommendations use a
+larger one. Models and ``prompt | model`` chains are built once per process
+and reused, so their clients keep their connections open between requests.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.core.tracing import start_span
+
+INTENT_ROLE = "intent"
+RECOMMENDATION_ROLE = "recommendation"
+
+
+def _gemini(model: str, temperature: float, max_output_tokens: int, role: str):
+    from model.gemini import create_gemini_chat_model
+
+    return create_gemini_chat_model(model, temperature, max_output_tokens)
+
+
+def _warm_up_gemini(chat_model):
+    from model.gemini import warm_up_gemini_chat_model
+
+    warm_up_gemini_chat_model(chat_model)
+
+
+def _fake(model: str, temperature: float, max_output_tokens: int, role: str):
+    from model.fake import create_fake_chat_model
+
+    return create_fake_chat_model(model, temperature, max_output_tokens, role=role)
+
+
+PROVIDERS: Dict[str, Callable[..., Any]] = {
+    "gemini": _gemini,
+    "fake": _fake,
+}
+
+# Optional per-provider hook that opens a chat model's connection ahead of use
+WARM_UPS: Dict[str, Callable[[Any], None]] = {
+    "gemini": _warm_up_gemini,
+}
+
+_models: Dict[str, Any] = {}
+# (role, id(prompt)) -> (prompt, chain); the prompt is kept so its id stays unique
+_chains: Dict[Tuple[str, int], Tuple[Any, Any]] = {}
+_lock = threading.Lock()
+_last_call_at = time.monotonic()
+
+
+def register_provider(
+    name: str, factory: Callable[..., Any], warm_up: Optional[Callable[[Any], None]] = None
+):
+    """
+    Register a factory ``(model, temperature, max_output_tokens, role) -> chat model``
+    and optionally a ``warm_up(chat_model)`` hook
+    """
+    PROVIDERS[name] = factory
+    if warm_up is not None:
+        WARM_UPS[name] = warm_up
+
+
+def get_model_config(role: str) -> Dict[str, Any]:
+    prefix = f"LLM_{role.upper()}_"
+    temperature = getattr(settings, prefix + "TEMPERATURE")
+    return {
+        "provider": getattr(settings, prefix + "PROVIDER") or settings.LLM_PROVIDER,
+        "model": getattr(settings, prefix + "MODEL"),
+        "temperature": settings.LLM_TEMPERATURE if temperature is None else temperature,
+        "max_output_tokens": getattr(settings, prefix + "MAX_TOKENS"),
+    }
+
+
+def get_chat_model(role: str):
+    """Return the shared chat model for a graph role, creating it on first use"""
+    chat_model = _models.get(role)
+    if chat_model is not None:
+        return chat_model
+
+    with _lock:
+        if role not in _models:
+            config = get_model_config(role)
+            factory = PROVIDERS.get(config["provider"])
+            if factory is None:
+                raise ValueError(f"Unknown LLM provider: {config['provider']}")
+            _models[role] = factory(config["model"], config["temperature"], config["max_output_tokens"], role)
+            logger.info(f"LLM for {role}: {config['provider']}/{config['model']} "
+                        f"(temperature={config['temperature']}, max_tokens={config['max_output_tokens']})")
+        return _models[role]
+
+
+def get_chain(role: str, prompt):
+    """Return the shared ``prompt | model`` chain for a role, creating it on first use"""
+    key = (role, id(prompt))
+    entry = _chains.get(key)
+    if entry is None:
+        chat_model = get_chat_model(role)
+        with _lock:
+            entry = _chains.get(key)
+            if entry is None:
+                entry = _chains[key] = (prompt, prompt | chat_model)
+    return entry[1]
+
+
+def warm_up_connection(role: str) -> float:
+    """
+    Open the role's model connection (DNS, TLS, auth) with the provider's
+    warm-up hook, if it has one. Returns the seconds it took.
+    """
+    global _last_call_at
+    config = get_model_config(role)
+    warm_up = WARM_UPS.get(config["provider"])
+    start_time = time.perf_counter()
+    if warm_up is not None:
+        warm_up(get_chat_model(role))
+        _last_call_at = time.monotonic()
+    elapsed = time.perf_counter() - start_time
+    metrics.observe("llm.warm_up_seconds", elapsed, role=role)
+    return elapsed
+
+
+def idle_seconds() -> float:
+    """Seconds since the last LLM call or warm-up"""
+    return time.monotonic() - _last_call_at
+
+
+def invoke_chat(role: str, prompt, inputs: Dict[str, Any]):
+    """
+    Run the shared ``prompt | model`` chain for a role and record the call's
+    latency and input/output token counts. Returns the model's message.
+    """
+    global _last_call_at
+    config = get_model_config(role)
+    with start_span(f"llm.{role}", provider=config["provider"], model=config["model"]) as span:
+        start_time = time.perf_counter()
+        message = get_chain(role, prompt).invoke(inputs)
+        _last_call_at = time.monotonic()
+        metrics.observe("llm.latency_seconds", time.perf_counter() - start_time, role=role)
+
+        usage = getattr(message, "usage_metadata", None) or {}
+        span.set_attributes(
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+        )
+    metrics.increment("llm.calls", role=role)
+    metrics.increment("llm.input_tokens", usage.get("input_tokens", 0), role=role)
+    metrics.increment("llm.output_tokens", usage.get("output_tokens", 0), role=role)
+    metrics.observe("llm.input_tokens_per_call", usage.get("input_tokens", 0), role=role)
+    return message
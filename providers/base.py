@@ -0,0 +1,56 @@
+"""
+Common interface for journey sources (rail, bus, flight, local stubs).
+
+A provider turns a station-to-station query into ``Journey`` records. The
+record keeps the shape the rail search always returned, so filtering,
+ranking and the recommendation prompt treat every mode alike; ``mode`` and
+``provider`` say where a journey came from, and ``fare`` carries the price
+of modes without per-class availability.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, TypedDict
+
+
+class Journey(TypedDict, total=False):
+    mode: str  # rail | bus | flight
+    provider: str
+    # Service number and name for every mode (named after the rail fields)
+    train_number: str
+    train_name: str
+    from_station: Dict[str, Any]
+    to_station: Dict[str, Any]
+    departure: Dict[str, Any]
+    arrival: Dict[str, Any]
+    duration_mins: Optional[int]
+    distance_km: Optional[float]
+    available_classes: List[str]
+    availability: Dict[str, Dict[str, Any]]
+    fare: Optional[float]
+    # Changes of service on the way; absent or 0 for a through service
+    changes: int
+
+
+class ProviderError(Exception):
+    """A provider could not answer; the message is reported per provider"""
+
+
+class TransportProvider(ABC):
+    """
+    Base class for journey providers. ``timeout`` bounds how long a search
+    waits for this provider before moving on without it.
+    """
+
+    name = "provider"
+    mode = "rail"
+    timeout: Optional[float] = None  # defaults to PROVIDER_TIMEOUT_SECONDS
+
+    @abstractmethod
+    def search(
+        self,
+        from_code: str,
+        to_code: str,
+        hours: int = 24,
+        from_location: Optional[str] = None,
+        to_location: Optional[str] = None,
+    ) -> List[Journey]:
+        """Journeys between two station codes; raise ProviderError on failure"""
@@ -1,6 +1,7 @@
 import os
 import requests
 from dotenv import load_dotenv
+from app.core.tracing import start_span
 
 load_dotenv()
 
@@ -19,6 +20,8 @@ class RailMCP:
             "toStationCode": to_station,
             "hours": hours,
         }
-        resp = requests.get(url, headers=headers, params=params, timeout=10)
-        resp.raise_for_status()
-        return resp.json()
+        with start_span("rail.live_station", route=f"{from_station}-{to_station}", hours=hours) as span:
+            resp = requests.get(url, headers=headers, params=params, timeout=10)
+            span.set_attribute("http_status", resp.status_code)
+            resp.raise_for_status()
+            return resp.json()
@@ -0,0 +1,25 @@
+from typing import List, Optional
+
+from providers.base import Journey, ProviderError, TransportProvider
+from tools.rail_tool import search_trains
+
+
+class RailProvider(TransportProvider):
+    """Indian Railways trains through the cached rail search"""
+
+    name = "rail"
+    mode = "rail"
+
+    def search(
+        self,
+        from_code: str,
+        to_code: str,
+        hours: int = 24,
+        from_location: Optional[str] = None,
+        to_location: Optional[str] = None,
+    ) -> List[Journey]:
+        result = search_trains(from_code, to_code, hours)
+        if not result.get("success"):
+            raise ProviderError(result.get("error", "Failed to fetch trains"))
+        # Copies, so tagging never touches the cached search result
+        return [{**train, "mode": self.mode, "provider": self.name} for train in result.get("trains", [])]
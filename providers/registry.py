@@ -0,0 +1,124 @@
+"""
+Journey provider registry and concurrent search.
+
+``search_journeys`` queries every enabled provider (``TRANSPORT_PROVIDERS``)
+at once on a shared thread pool and merges what comes back within each
+provider's timeout. A provider that is slow or failing is reported in the
+per-provider status and left behind; its thread finishes in the background
+without delaying the others.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import hot_logger, logger
+from app.core.metrics import metrics
+from app.core.profiling import profile_thread
+from app.core.tracing import start_span
+from providers.base import Journey, TransportProvider
+from providers.railway.provider import RailProvider
+
+PROVIDERS: Dict[str, TransportProvider] = {
+    "rail": RailProvider(),
+}
+
+# Not used as a context manager: shutting it down would wait for slow providers
+_executor = ThreadPoolExecutor(max_workers=settings.PROVIDER_MAX_WORKERS, thread_name_prefix="provider")
+
+
+def register_provider(provider: TransportProvider):
+    """Register (or replace) a provider; it is searched once listed in TRANSPORT_PROVIDERS"""
+    PROVIDERS[provider.name] = provider
+
+
+def get_enabled_providers() -> List[TransportProvider]:
+    enabled = []
+    for name in settings.TRANSPORT_PROVIDERS:
+        provider = PROVIDERS.get(name)
+        if provider is None:
+            logger.warning(f"Transport provider '{name}' is enabled but not registered")
+            continue
+        enabled.append(provider)
+    return enabled
+
+
+def provider_timeout(provider: TransportProvider) -> float:
+    if provider.name in settings.PROVIDER_TIMEOUTS:
+        return float(settings.PROVIDER_TIMEOUTS[provider.name])
+    return provider.timeout if provider.timeout is not None else settings.PROVIDER_TIMEOUT_SECONDS
+
+
+def _search_one(provider: TransportProvider, *args) -> Tuple[List[Journey], float]:
+    start_time = time.perf_counter()
+    with profile_thread(), start_span(f"provider.{provider.name}", mode=provider.mode) as span:
+        journeys = provider.search(*args)
+        span.set_attribute("journeys", len(journeys))
+    return journeys, time.perf_counter() - start_time
+
+
+def _journey_key(journey: Journey) -> Tuple[Any, ...]:
+    return (journey.get("mode"), journey.get("train_number"), (journey.get("departure") or {}).get("time"))
+
+
+def search_journeys(
+    from_code: str,
+    to_code: str,
+    hours: int = 24,
+    from_location: Optional[str] = None,
+    to_location: Optional[str] = None,
+    providers: Optional[List[TransportProvider]] = None,
+) -> Dict[str, Any]:
+    """
+    Search all enabled providers concurrently and merge their journeys.
+    ``success`` is False only when every provider failed or timed out.
+    """
+    providers = get_enabled_providers() if providers is None else providers
+    started = time.perf_counter()
+    args = (from_code.upper(), to_code.upper(), hours, from_location, to_location)
+    futures = [
+        (provider, _executor.submit(contextvars.copy_context().run, _search_one, provider, *args))
+        for provider in providers
+    ]
+
+    journeys: List[Journey] = []
+    seen = set()
+    statuses: Dict[str, Dict[str, Any]] = {}
+    errors = []
+    for provider, future in futures:
+        timeout = provider_timeout(provider)
+        try:
+            # Deadlines run from the common start, so waiting on one provider
+            # never extends another's
+            found, elapsed = future.result(timeout=max(timeout - (time.perf_counter() - started), 0))
+        except FutureTimeoutError:
+            future.cancel()
+            metrics.increment("provider.timeouts", provider=provider.name)
+            statuses[provider.name] = {"status": "timeout", "journeys": 0, "elapsed_ms": round(timeout * 1000)}
+            errors.append(f"{provider.name}: timed out after {timeout:g}s")
+            continue
+        except Exception as e:
+            metrics.increment("provider.errors", provider=provider.name)
+            logger.warning(f"Provider {provider.name} failed for {from_code} -> {to_code}: {str(e)}")
+            statuses[provider.name] = {"status": "error", "journeys": 0, "error": str(e)}
+            errors.append(str(e) if len(providers) == 1 else f"{provider.name}: {e}")
+            continue
+
+        metrics.observe("provider.latency_seconds", elapsed, provider=provider.name)
+        statuses[provider.name] = {"status": "ok", "journeys": len(found), "elapsed_ms": round(elapsed * 1000, 1)}
+        for journey in found:
+            key = _journey_key(journey)
+            if key not in seen:
+                seen.add(key)
+                journeys.append(journey)
+
+    hot_logger.info("Providers %s returned %d journeys for %s -> %s",
+                    ",".join(statuses) or "-", len(journeys), from_code, to_code)
+    success = any(status["status"] == "ok" for status in statuses.values())
+    return {
+        "success": success,
+        "journeys": journeys,
+        "providers": statuses,
+        "error": None if success else ("; ".join(errors) or "No transport providers enabled"),
+    }
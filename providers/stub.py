@@ -0,0 +1,35 @@
+import time
+from typing import Callable, List, Optional, Sequence, Union
+
+from providers.base import Journey, TransportProvider
+
+Journeys = Union[Sequence[Journey], Callable[[str, str], Sequence[Journey]]]
+
+
+class StubProvider(TransportProvider):
+    """
+    Canned journeys, optionally after a delay to simulate a slow source; used
+    by ``benchmarks/provider_fanout_benchmark.py``. ``journeys`` is a list or
+    a ``(from, to)`` callable, which may raise ProviderError.
+    """
+
+    def __init__(self, name: str, mode: str, journeys: Journeys, latency_seconds: float = 0.0,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.mode = mode
+        self.journeys = journeys
+        self.latency_seconds = latency_seconds
+        self.timeout = timeout
+
+    def search(
+        self,
+        from_code: str,
+        to_code: str,
+        hours: int = 24,
+        from_location: Optional[str] = None,
+        to_location: Optional[str] = None,
+    ) -> List[Journey]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        journeys = self.journeys(from_code, to_code) if callable(self.journeys) else self.journeys
+        return [{**journey, "mode": self.mode, "provider": self.name} for journey in journeys]
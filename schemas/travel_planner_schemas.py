@@ -6,14 +6,26 @@ DEFAULT_TRAVEL_STATE: Dict[str, Any] = {
     "to_location": None,
     "from_station_code": None,
     "to_station_code": None,
+    "from_station_candidates": [],
+    "to_station_candidates": [],
     "travel_date": None,
     "time_preference": None,
     "budget_preference": None,
     "direct_only": False,
+    "return_date": None,
+    "return_time_preference": None,
+    "travel_class": None,
+    "max_fare": None,
+    "sort_by": None,
     "available_trains": [],
     "total_trains": 0,
+    "provider_status": {},
     "filtered_trains": [],
     "top_recommendations": [],
+    "return_trains": [],
+    "return_filtered_trains": [],
+    "return_top_recommendations": [],
+    "round_trip_options": [],
     "ai_recommendation": "",
     "reasoning": "",
     "current_step": "initialized",
@@ -0,0 +1,110 @@
+"""
+Lazy access to the travel agent. The orchestrator pulls in LangGraph and the
+Gemini client, so it is only imported and built on first use (or by the
+background warm-up at startup) instead of when the API modules load.
+"""
+import asyncio
+import threading
+import time
+
+from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.logger import logger
+from app.core.profiling import call_with_profiling
+from app.core.tracing import start_span
+from app.utils.exceptions import AppException
+
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent():
+    """Return the shared TravelAgentOrchestrator, creating it on first call"""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                from services.agent_orchestrator import TravelAgentOrchestrator
+
+                _agent = TravelAgentOrchestrator()
+    return _agent
+
+
+def preload_agent():
+    """
+    Compile the graph in the parent process before workers fork, so they share
+    it copy-on-write. Network clients are left to each worker's warm-up.
+    """
+    get_agent()
+
+
+def warm_up_agent():
+    """
+    Build the graph, LLM clients and chains ahead of the first /plan-trip
+    request and open the LLM connections so it does not pay for DNS and TLS
+    """
+    start_time = time.time()
+    get_agent()
+
+    from agents.travel_graph import CHAIN_PROMPTS
+    from model.registry import get_chain
+
+    for role, prompt in CHAIN_PROMPTS:
+        get_chain(role, prompt)
+    if settings.LLM_WARM_UP_CONNECTIONS:
+        warm_up_llm_connections()
+    logger.info(f"Agent warm-up completed in {time.time() - start_time:.2f}s")
+
+
+def warm_up_llm_connections():
+    """Open each role's LLM connection; a failure is logged, not raised"""
+    from model.registry import INTENT_ROLE, RECOMMENDATION_ROLE, warm_up_connection
+
+    for role in (INTENT_ROLE, RECOMMENDATION_ROLE):
+        try:
+            elapsed = warm_up_connection(role)
+            logger.info(f"LLM connection for {role} warmed in {elapsed * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"LLM connection warm-up for {role} failed: {str(e)}")
+
+
+async def warm_up_until_ready(retry_seconds: float = 5.0):
+    """Warm the agent in a worker thread, retrying until it succeeds, then report ready"""
+    while True:
+        try:
+            await asyncio.to_thread(warm_up_agent)
+            lifecycle.mark_ready()
+            return
+        except Exception as e:
+            logger.error(f"Agent warm-up failed, retrying in {retry_seconds}s: {str(e)}")
+            await asyncio.sleep(retry_seconds)
+
+
+async def keep_llm_connections_warm(interval: float):
+    """Re-warm LLM connections that sat idle for ``interval`` seconds, before the upstream drops them"""
+    from model.registry import idle_seconds
+
+    while True:
+        await asyncio.sleep(max(interval - idle_seconds(), 1.0))
+        if lifecycle.is_ready() and idle_seconds() >= interval:
+            await asyncio.to_thread(warm_up_llm_connections)
+
+
+async def run_agent(method: str, *args, during_drain: bool = False):
+    """
+    Run an orchestrator method in a worker thread so the event loop stays free,
+    tracked as in-flight for graceful drain on shutdown and profiled when the
+    request opted in. ``during_drain`` lets already accepted work (queued
+    jobs) finish after shutdown has started.
+    """
+    if lifecycle.draining and not during_drain:
+        raise AppException("Server is shutting down, please retry", status_code=503)
+    submitted_at = time.perf_counter()
+
+    def call():
+        queue_wait_ms = round((time.perf_counter() - submitted_at) * 1000, 3)
+        with start_span(f"agent.{method}", queue_wait_ms=queue_wait_ms):
+            return call_with_profiling(method, getattr(get_agent(), method), *args)
+
+    with lifecycle.in_flight.track():
+        return await asyncio.to_thread(call)
@@ -1,5 +1,13 @@
 from copy import deepcopy
-from agents.travel_graph import travel_planner_graph
+from uuid import uuid4
+from agents.checkpointer import get_checkpoint_store
+from agents.travel_graph import (
+    INTENT_FIELDS,
+    analyze_trains_node,
+    extract_follow_up_intent,
+    get_travel_planner_graph,
+    run_from_node,
+)
 from agents.state import TravelPlannerState
 from app.constants.agent_constant import (
     COMPLETE_STATE_TIME,
@@ -9,32 +17,63 @@ from app.constants.agent_constant import (
     PROCESSING_STATE,
 )
 from app.constants.common import WORKFLOW_DESCRIPTION
-from app.core.logger import logger
-from typing import Dict, Any
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.logger import hot_logger, logger
+from typing import Dict, Any, List, Optional
 import time
 from schemas.travel_planner_schemas import DEFAULT_TRAVEL_STATE
 
+# Earliest node that must re-run when an intent field changes in a follow-up
+FIELD_RERUN_NODE = {
+    "from_location": "validate_locations",
+    "to_location": "validate_locations",
+    "time_preference": "analyze_trains",
+    "budget_preference": "analyze_trains",
+    "direct_only": "analyze_trains",
+    # Dates set the time at destination of round-trip pairings
+    "travel_date": "analyze_trains",
+    "return_date": "fetch_trains",
+    "return_time_preference": "analyze_trains",
+}
+NODE_ORDER = ["validate_locations", "fetch_trains", "analyze_trains", "generate_recommendations"]
+
+# Sessions and result sets live in the shared cache tier, so a follow-up or
+# re-filter can land on any worker
+SESSION_NAMESPACE = "session"
+RESULT_SET_NAMESPACE = "result_set"
+
 
 class TravelAgentOrchestrator:
     def __init__(self):
-        self.graph = travel_planner_graph
+        self.graph = get_travel_planner_graph()
+        self.checkpoints = get_checkpoint_store()
         logger.info(INITIALIZED_STATE)
 
-    def plan_trip(self, user_query: str) -> Dict[str, Any]:
+    def plan_trip(self, user_query: str, thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run the planning graph for a query. Retrying with the same
+        ``thread_id`` resumes after the last node that succeeded.
+        """
         try:
-            logger.info(f"{PROCESSING_STATE} {user_query}")
+            hot_logger.info("%s %s", PROCESSING_STATE, user_query)
             start_time = time.time()
+            thread_id = thread_id or uuid4().hex
 
             initial_state = deepcopy(DEFAULT_TRAVEL_STATE)
             initial_state["user_query"] = user_query
 
-            logger.info(EXECUTING_STATE)
-            final_state = self.graph.invoke(initial_state)
+            hot_logger.info(EXECUTING_STATE)
+            final_state = self._run_graph(initial_state, thread_id)
 
             processing_time = time.time() - start_time
-            logger.info(f"{COMPLETE_STATE_TIME} {processing_time:.2f}s")
+            hot_logger.info("%s %.2fs", COMPLETE_STATE_TIME, processing_time)
 
-            return self._format_response(final_state, processing_time)
+            response = self._format_response(final_state, processing_time)
+            if response["success"]:
+                response["result_id"] = self._store_result(final_state)
+            response["thread_id"] = thread_id
+            return response
 
         except Exception as e:
             logger.error(f"{ERROR_STATE} {str(e)}", exc_info=True)
@@ -44,6 +83,130 @@ class TravelAgentOrchestrator:
                 "query": user_query,
             }
 
+    def converse(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        conversation_history: Optional[List[dict]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Handle one conversation turn. Follow-ups reuse the session's last graph
+        state and only re-run the nodes affected by the fields that changed.
+        """
+        try:
+            start_time = time.time()
+            # Past the per-process front tier: another worker may have run the last turn
+            previous_state = cache.get(SESSION_NAMESPACE, session_id, fresh=True) if session_id else None
+
+            if previous_state is None:
+                session_id = session_id or uuid4().hex
+                user_turns = [
+                    m.get("content", "") for m in conversation_history or [] if m.get("role", "user") == "user"
+                ]
+                initial_state = deepcopy(DEFAULT_TRAVEL_STATE)
+                initial_state["user_query"] = " ".join(user_turns + [message])
+                final_state = self._run_graph(initial_state, f"session-{session_id}")
+                changed_fields, rerun_from = list(INTENT_FIELDS), "extract_intent"
+            else:
+                intent = extract_follow_up_intent(previous_state, message)
+                changed_fields = [f for f in INTENT_FIELDS if intent[f] != previous_state.get(f)]
+                rerun_from = self._earliest_rerun_node(changed_fields)
+                hot_logger.info("Session %s: changed %s, re-running from %s", session_id, changed_fields, rerun_from)
+
+                if rerun_from is None:
+                    final_state = {**previous_state, "user_query": message}
+                else:
+                    state = {
+                        **previous_state,
+                        **intent,
+                        "user_query": message,
+                        "error": None,
+                        "needs_clarification": False,
+                        "clarification_message": None,
+                    }
+                    final_state = run_from_node(state, rerun_from)
+
+            cache.set(SESSION_NAMESPACE, session_id, value=final_state, ttl=settings.SESSION_TTL_SECONDS)
+            processing_time = time.time() - start_time
+
+            response = self._format_response(final_state, processing_time)
+            if response["success"]:
+                response["result_id"] = self._store_result(final_state)
+            response["session_id"] = session_id
+            response["changed_fields"] = changed_fields
+            response["rerun_from"] = rerun_from
+            return response
+
+        except Exception as e:
+            logger.error(f"{ERROR_STATE} {str(e)}", exc_info=True)
+            return {
+                "success": False,
+                "error": f"{ERROR_STATE} {str(e)}",
+                "query": message,
+                "session_id": session_id,
+            }
+
+    def refilter(self, result_id: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Re-rank a stored result set with new filters. Only analyze_trains_node
+        runs; the stored trains are reused and neither the rail API nor the LLM
+        is called. Returns None when the result id is unknown or expired.
+        """
+        stored_state = cache.get(RESULT_SET_NAMESPACE, result_id)
+        if stored_state is None:
+            return None
+
+        start_time = time.time()
+        state = analyze_trains_node({**stored_state, **filters, "error": None})
+        filtered = state.get("filtered_trains", [])
+        state = {
+            **state,
+            "top_recommendations": filtered[:3],
+            "return_top_recommendations": state.get("return_filtered_trains", [])[:3] if state.get("return_date") else [],
+            "reasoning": "Re-ranked with the new filters; AI analysis not regenerated",
+        }
+
+        response = self._format_response(state, time.time() - start_time)
+        response["result_id"] = result_id
+        return response
+
+    def _run_graph(self, initial_state: TravelPlannerState, thread_id: str) -> TravelPlannerState:
+        """
+        Invoke the graph under a checkpointed thread. If the thread already ran
+        this query, a completed run is returned as is and a failed one resumes
+        from the checkpoint after its last successful node.
+        """
+        if self.checkpoints is None:
+            return self.graph.invoke(initial_state)
+
+        config = {"configurable": {"thread_id": thread_id}}
+        self.checkpoints.touch(thread_id)
+
+        latest = self.graph.get_state(config)
+        if latest.values and latest.values.get("user_query") == initial_state["user_query"]:
+            if not latest.next and not latest.values.get("error"):
+                hot_logger.info("Thread %s already completed, reusing its result", thread_id)
+                return latest.values
+            for snapshot in self.graph.get_state_history(config):
+                if snapshot.next and not snapshot.values.get("error"):
+                    hot_logger.info("Thread %s resuming at %s", thread_id, snapshot.next[0])
+                    return self.graph.invoke(None, snapshot.config)
+
+        return self.graph.invoke(initial_state, config)
+
+    def _store_result(self, state: TravelPlannerState) -> str:
+        result_id = uuid4().hex
+        cache.set(RESULT_SET_NAMESPACE, result_id, value=state, ttl=settings.RESULT_STORE_TTL_SECONDS)
+        return result_id
+
+    @staticmethod
+    def _earliest_rerun_node(changed_fields: List[str]) -> Optional[str]:
+        nodes = {FIELD_RERUN_NODE[f] for f in changed_fields}
+        for node in NODE_ORDER:
+            if node in nodes:
+                return node
+        return None
+
     def _format_response(
         self, state: TravelPlannerState, processing_time: float
     ) -> Dict[str, Any]:
@@ -62,7 +225,12 @@ class TravelAgentOrchestrator:
                 "query": state.get("user_query"),
             }
 
-        return {
+        all_filtered_trains = list(state.get("filtered_trains", [])[:10])
+        top_indexes = self._reference_trains(
+            state.get("top_recommendations", [])[:3], all_filtered_trains
+        )
+
+        response = {
             "success": True,
             "query": state.get("user_query"),
             "intent": {
@@ -70,16 +238,20 @@ class TravelAgentOrchestrator:
                 "to_location": state.get("to_location"),
                 "from_station": state.get("from_station_code"),
                 "to_station": state.get("to_station_code"),
+                "from_station_candidates": state.get("from_station_candidates") or [],
+                "to_station_candidates": state.get("to_station_candidates") or [],
                 "travel_date": state.get("travel_date"),
                 "time_preference": state.get("time_preference"),
                 "budget_preference": state.get("budget_preference"),
                 "direct_only": state.get("direct_only"),
+                "return_date": state.get("return_date"),
+                "return_time_preference": state.get("return_time_preference"),
             },
             "results": {
                 "total_trains_found": state.get("total_trains", 0),
                 "filtered_trains_count": len(state.get("filtered_trains", [])),
-                "top_recommendations": state.get("top_recommendations", [])[:3],
-                "all_filtered_trains": state.get("filtered_trains", [])[:10],
+                "top_recommendation_indexes": top_indexes,
+                "all_filtered_trains": all_filtered_trains,
             },
             "ai_analysis": {
                 "recommendation": state.get("ai_recommendation"),
@@ -89,8 +261,42 @@ class TravelAgentOrchestrator:
                 "processing_time_seconds": round(processing_time, 2),
                 "workflow_step": state.get("current_step"),
                 "timestamp": state.get("timestamp"),
+                "providers": state.get("provider_status") or {},
             },
         }
+        if state.get("return_date"):
+            return_trains = list(state.get("return_filtered_trains", [])[:10])
+            response["results"]["round_trip"] = {
+                "return_filtered_trains_count": len(state.get("return_filtered_trains", [])),
+                "return_top_recommendation_indexes": self._reference_trains(
+                    state.get("return_top_recommendations", [])[:3], return_trains
+                ),
+                "all_return_trains": return_trains,
+                # Indexes point into all_filtered_trains and all_return_trains
+                "options": state.get("round_trip_options", []),
+            }
+        return response
+
+    @staticmethod
+    def _reference_trains(trains: List[Dict[str, Any]], train_list: List[Dict[str, Any]]) -> List[int]:
+        """
+        Map ``trains`` to indexes into ``train_list`` so each train is sent once.
+        Trains missing from the list are appended to it. Service numbers are
+        only unique within a provider, so both identify a train.
+        """
+        def key(train: Dict[str, Any]):
+            return train.get("provider"), train.get("train_number")
+
+        positions = {key(t): i for i, t in enumerate(train_list)}
+        indexes = []
+        for train in trains:
+            index = positions.get(key(train))
+            if index is None:
+                index = len(train_list)
+                train_list.append(train)
+                positions[key(train)] = index
+            indexes.append(index)
+        return indexes
 
     def get_graph_visualization(self) -> str:
         return WORKFLOW_DESCRIPTION
\ No newline at end of file
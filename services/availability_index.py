@@ -0,0 +1,186 @@
+"""
+Seat availability from train search results, indexed by class, quota and
+status so queries like "3A, confirmed, under Rs 2000" need no scan of the
+nested per-train payload.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+Route = Tuple[str, str, int]
+IndexKey = Tuple[str, str, str]
+
+# Normalised status categories
+AVAILABLE = "available"
+RAC = "rac"
+WAITLIST = "waitlist"
+REGRET = "regret"
+NOT_AVAILABLE = "not_available"
+UNKNOWN = "unknown"
+
+STATUSES = (AVAILABLE, RAC, WAITLIST, REGRET, NOT_AVAILABLE, UNKNOWN)
+QUOTAS = ("general", "tatkal")
+
+_NUMBER = re.compile(r"(\d+)")
+
+
+def parse_status(status: Optional[str]) -> Tuple[str, Optional[int]]:
+    """
+    Split an upstream availability string into a category and a count
+    ('AVAILABLE-0042' -> ('available', 42), 'GNWL23/WL12' -> ('waitlist', 12))
+    """
+    text = (status or "").upper().replace(" ", "")
+    numbers = _NUMBER.findall(text)
+    count = int(numbers[-1]) if numbers else None
+
+    if not text:
+        return UNKNOWN, None
+    if text.startswith("NOTAVAILABLE") or text.startswith("TRAINDEPARTED"):
+        return NOT_AVAILABLE, None
+    if "REGRET" in text:
+        return REGRET, None
+    if "AVAILABLE" in text or text.startswith("AVL") or text.startswith("CURR_AVBL"):
+        return AVAILABLE, count
+    if text.startswith("RAC"):
+        return RAC, count
+    if "WL" in text:
+        return WAITLIST, count
+    return UNKNOWN, count
+
+
+def parse_number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def extract_records(route: Route, trains: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten each train's nested availability into one record per class and quota"""
+    from_station, to_station, hours = route
+    records = []
+    for train in trains:
+        for class_type, quotas in (train.get("availability") or {}).items():
+            for quota in QUOTAS:
+                entry = quotas.get(quota)
+                if not entry:
+                    continue
+                status, count = parse_status(entry.get("status"))
+                records.append({
+                    "from_station": from_station,
+                    "to_station": to_station,
+                    "hours": hours,
+                    "train_number": train.get("train_number"),
+                    "train_name": train.get("train_name"),
+                    "departure_time": (train.get("departure") or {}).get("time"),
+                    "arrival_time": (train.get("arrival") or {}).get("time"),
+                    "duration_mins": train.get("duration_mins"),
+                    "travel_class": class_type,
+                    "quota": quota,
+                    "status": status,
+                    "count": count,
+                    "raw_status": entry.get("status"),
+                    "fare": parse_number(entry.get("fare")),
+                    "prediction_percentage": parse_number(entry.get("prediction_percentage")),
+                })
+    return records
+
+
+class AvailabilityIndex:
+    """
+    Thread-safe in-process index of availability records.
+
+    Records are grouped per route so a fresh search replaces the route's
+    previous records, and bucketed by ``(class, quota, status)`` for lookups.
+    Routes expire together with the cached search they came from.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Route, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._buckets: Dict[IndexKey, Dict[Route, List[Dict[str, Any]]]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def ingest(self, route: Route, trains: List[Dict[str, Any]], expires_at: float):
+        records = extract_records(route, trains)
+        grouped: Dict[IndexKey, List[Dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            grouped[(record["travel_class"], record["quota"], record["status"])].append(record)
+
+        with self._lock:
+            self._remove(route)
+            self._routes[route] = (expires_at, records)
+            for key, bucket_records in grouped.items():
+                self._buckets[key][route] = bucket_records
+
+    def has_route(self, route: Route) -> bool:
+        return self.expires_at(route) is not None
+
+    def expires_at(self, route: Route) -> Optional[float]:
+        """When the route's records expire; None when it is not indexed"""
+        with self._lock:
+            entry = self._routes.get(route)
+            return entry[0] if entry is not None and entry[0] > time.time() else None
+
+    def query(
+        self,
+        route: Optional[Route] = None,
+        travel_class: Optional[str] = None,
+        quota: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        max_fare: Optional[float] = None,
+        min_prediction: Optional[float] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Matching records, cheapest first"""
+        travel_class = travel_class.upper() if travel_class else None
+        now = time.time()
+        matches = []
+        with self._lock:
+            self._purge_expired(now)
+            for (class_type, record_quota, status), routes in self._buckets.items():
+                if travel_class and class_type != travel_class:
+                    continue
+                if quota and record_quota != quota:
+                    continue
+                if statuses and status not in statuses:
+                    continue
+                if route is not None:
+                    matches.extend(routes.get(route, ()))
+                else:
+                    for records in routes.values():
+                        matches.extend(records)
+
+        if max_fare is not None:
+            matches = [r for r in matches if r["fare"] is not None and r["fare"] <= max_fare]
+        if min_prediction is not None:
+            # Confirmed seats need no prediction
+            matches = [
+                r for r in matches
+                if r["status"] == AVAILABLE
+                or (r["prediction_percentage"] is not None and r["prediction_percentage"] >= min_prediction)
+            ]
+        matches.sort(key=lambda r: (r["fare"] is None, r["fare"] or 0, r["departure_time"] or ""))
+        return matches[:limit]
+
+    def routes(self) -> List[Route]:
+        with self._lock:
+            self._purge_expired(time.time())
+            return list(self._routes)
+
+    def _purge_expired(self, now: float):
+        for route in [r for r, (expires_at, _) in self._routes.items() if expires_at <= now]:
+            self._remove(route)
+
+    def _remove(self, route: Route):
+        if self._routes.pop(route, None) is None:
+            return
+        for key in list(self._buckets):
+            self._buckets[key].pop(route, None)
+            if not self._buckets[key]:
+                del self._buckets[key]
+
+
+availability_index = AvailabilityIndex()
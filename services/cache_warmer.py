@@ -0,0 +1,106 @@
+"""
+Background refresh of popular train-search routes before their cache entries
+expire, so the first user on a busy pair does not pay upstream latency.
+
+Every worker runs a warmer over its own sample of the traffic, but each
+refresh first claims the route and a slot of ``CACHE_WARMER_REQUEST_BUDGET``
+for the current interval in the shared cache tier, so the budget holds for
+the whole host and no route is refreshed twice in one interval.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.logger import logger
+from services.route_popularity import RoutePopularity, route_popularity
+from tools.rail_tool import TRAIN_SEARCH_NAMESPACE, fetch_trains_from_upstream, store_train_search
+
+CACHE_WARMER_NAMESPACE = "cache_warmer"
+
+
+class CacheWarmer:
+    def __init__(self, popularity: RoutePopularity = route_popularity):
+        self.popularity = popularity
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not settings.CACHE_WARMER_ENABLED or self._task is not None:
+            return
+        self.popularity.seed_metro_routes()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Cache warmer started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Cache warmer stopped")
+
+    async def _run(self):
+        while True:
+            # Jitter keeps workers (and cycles) from hitting the upstream in lockstep
+            await asyncio.sleep(
+                settings.CACHE_WARMER_INTERVAL_SECONDS
+                + random.uniform(0, settings.CACHE_WARMER_JITTER_SECONDS)
+            )
+            try:
+                await self.refresh_cycle()
+            except Exception as e:
+                logger.error(f"Cache warmer cycle failed: {str(e)}")
+
+    async def refresh_cycle(self) -> int:
+        """Refresh the top-N routes that are about to expire, within the shared request budget"""
+        interval = settings.CACHE_WARMER_INTERVAL_SECONDS
+        window = int(time.time() // interval)
+        refreshed = 0
+
+        for from_station, to_station, hours in self.popularity.top(settings.CACHE_WARMER_TOP_N):
+            expires_at = cache.expires_at(TRAIN_SEARCH_NAMESPACE, from_station, to_station, hours)
+            if expires_at is not None and expires_at - time.time() > settings.CACHE_WARMER_REFRESH_AHEAD_SECONDS:
+                continue
+
+            # Another worker is refreshing this route in the same interval
+            if not self._claim(interval, window, "route", from_station, to_station, hours):
+                continue
+            if not self._claim_budget_slot(interval, window):
+                cache.delete(CACHE_WARMER_NAMESPACE, window, "route", from_station, to_station, hours)
+                break
+
+            if refreshed:
+                await asyncio.sleep(random.uniform(0, settings.CACHE_WARMER_JITTER_SECONDS))
+
+            result = await asyncio.to_thread(fetch_trains_from_upstream, from_station, to_station, hours)
+            # A failed refresh leaves the current entry to expire on its own
+            if not result.get("success"):
+                logger.warning(f"Cache warmer could not refresh {from_station} -> {to_station}: {result.get('error')}")
+                continue
+            store_train_search(from_station, to_station, hours, result)
+            refreshed += 1
+
+        self.popularity.decay_counts()
+        if refreshed:
+            logger.info(f"Cache warmer refreshed {refreshed} route(s)")
+        return refreshed
+
+    @staticmethod
+    def _claim(interval: float, window: int, *parts) -> bool:
+        # Claims outlive their interval slightly, so a late cycle cannot reuse them
+        return cache.add(CACHE_WARMER_NAMESPACE, window, *parts, value=os.getpid(), ttl=interval * 2)
+
+    def _claim_budget_slot(self, interval: float, window: int) -> bool:
+        return any(
+            self._claim(interval, window, "budget", slot)
+            for slot in range(settings.CACHE_WARMER_REQUEST_BUDGET)
+        )
+
+
+cache_warmer = CacheWarmer()
@@ -0,0 +1,217 @@
+"""
+Asynchronous trip-planning jobs: submit now, poll (or receive a webhook) later.
+
+Jobs go into a bounded in-process queue drained by a fixed pool of worker
+tasks, so bursts are smoothed into a steady rate of agent runs. Idempotency
+keys map duplicate submissions to the same job, and finished jobs are kept
+for ``JOB_RESULT_TTL_SECONDS``.
+
+A job runs in the worker process that accepted it, but its record and
+idempotency key are kept in the shared SQLite cache tier, so any worker can
+answer a poll or a resubmission.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.logger import logger, request_id_var
+from app.core.security import resolves_to_public_host
+from app.utils.exceptions import AppException
+from app.utils.serialization import dumps
+from services.agent_loader import run_agent
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+JOB_NAMESPACE = "job"
+JOB_IDEMPOTENCY_NAMESPACE = "job_idempotency"
+
+# Fields kept on the job record but not returned to clients
+_PRIVATE_FIELDS = ("webhook_url", "request_hash")
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in job.items() if k not in _PRIVATE_FIELDS}
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queued: int = 100,
+        result_ttl: float = 3600,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+
+    def start(self):
+        """Start the worker pool; call from the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._accepting = True
+        logger.info(f"Job queue started with {self.workers} worker(s)")
+
+    async def stop(self, timeout: float):
+        """Stop accepting jobs, let queued ones finish for up to ``timeout`` seconds"""
+        self._accepting = False
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job queue stopped with {self._queue.qsize()} job(s) still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        query: str,
+        idempotency_key: Optional[str] = None,
+        webhook_url: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a plan-trip job. Returns ``(job, created)``; ``created`` is False
+        when the idempotency key matched an existing job.
+        """
+        if not self._accepting or lifecycle.draining:
+            raise AppException("Server is shutting down, please retry", status_code=503)
+
+        request_hash = hashlib.sha256(f"{query}\n{webhook_url or ''}".encode()).hexdigest()
+        if idempotency_key:
+            existing = self._job_for_key(idempotency_key)
+            if existing is not None:
+                return self._check_duplicate(existing, request_hash), False
+        if self._queue.full():
+            raise AppException("Job queue is full, please retry later", status_code=429)
+
+        job = {
+            "job_id": uuid4().hex,
+            "status": QUEUED,
+            "query": query,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "thread_id": thread_id,
+            "webhook_url": webhook_url,
+            "request_hash": request_hash,
+        }
+        self._save(job)
+        # Claiming the key is atomic across workers: of two concurrent
+        # submissions only one queues a job, the other gets the winner's
+        if idempotency_key and not cache.add(
+            JOB_IDEMPOTENCY_NAMESPACE, idempotency_key, value=job["job_id"], ttl=self.result_ttl
+        ):
+            cache.delete(JOB_NAMESPACE, job["job_id"])
+            existing = self._job_for_key(idempotency_key)
+            if existing is None:
+                raise AppException("Idempotency key is in use by another request, please retry", status_code=409)
+            return self._check_duplicate(existing, request_hash), False
+
+        self._queue.put_nowait(job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        # Past the per-process front tier: the record is updated by whichever
+        # worker runs the job
+        return cache.get(JOB_NAMESPACE, job_id, fresh=True)
+
+    def _save(self, job: Dict[str, Any]):
+        cache.set(JOB_NAMESPACE, job["job_id"], value=job, ttl=self.result_ttl)
+
+    def _job_for_key(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        job_id = cache.get(JOB_IDEMPOTENCY_NAMESPACE, idempotency_key, fresh=True)
+        return self.get(job_id) if job_id else None
+
+    @staticmethod
+    def _check_duplicate(existing: Dict[str, Any], request_hash: str) -> Dict[str, Any]:
+        if existing["request_hash"] != request_hash:
+            raise AppException("Idempotency key was already used for a different request", status_code=409)
+        return existing
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            token = request_id_var.set(job["job_id"])
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed on {job['job_id']}: {str(e)}", exc_info=True)
+            finally:
+                request_id_var.reset(token)
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        job["status"] = RUNNING
+        job["started_at"] = time.time()
+        self._save(job)
+        try:
+            result = await run_agent("plan_trip", job["query"], job["thread_id"], during_drain=True)
+            job["result"] = result
+            if result.get("success"):
+                job["status"] = SUCCEEDED
+            else:
+                # The agent reports errors and clarification requests in the
+                # result rather than raising; the result is kept for details
+                job["error"] = result.get("error") or result.get("message") or "Trip planning failed"
+                job["status"] = FAILED
+                logger.warning(f"Job {job['job_id']} failed: {job['error']}")
+        except Exception as e:
+            message = e.message if isinstance(e, AppException) else str(e)
+            logger.error(f"Job {job['job_id']} failed: {message}")
+            job["error"] = message
+            job["status"] = FAILED
+        job["finished_at"] = time.time()
+        # Keep the finished job for the full TTL from completion
+        self._save(job)
+
+        if job["webhook_url"]:
+            await self._notify(job)
+
+    async def _notify(self, job: Dict[str, Any]):
+        """POST the finished job to its webhook, retrying with backoff"""
+        import httpx
+
+        # Checked again at send time: the name may resolve differently now
+        if not await resolves_to_public_host(job["webhook_url"]):
+            logger.warning(f"Webhook for job {job['job_id']} skipped: host does not resolve to a public address")
+            return
+        payload = dumps(public_job(job))
+        async with httpx.AsyncClient(timeout=settings.JOB_WEBHOOK_TIMEOUT_SECONDS) as client:
+            for attempt in range(1, settings.JOB_WEBHOOK_MAX_ATTEMPTS + 1):
+                try:
+                    response = await client.post(
+                        job["webhook_url"], content=payload, headers={"Content-Type": "application/json"}
+                    )
+                    response.raise_for_status()
+                    return
+                except httpx.HTTPError as e:
+                    logger.warning(f"Webhook for job {job['job_id']} failed (attempt {attempt}): {str(e)}")
+                    if attempt < settings.JOB_WEBHOOK_MAX_ATTEMPTS:
+                        await asyncio.sleep(2 ** (attempt - 1))
+
+
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_queued=settings.JOB_QUEUE_MAX_SIZE,
+    result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+)
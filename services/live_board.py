@@ -0,0 +1,269 @@
+"""
+Live station boards pushed to clients over WebSocket or SSE.
+
+Each watched ``(from, to, hours)`` route is polled upstream by exactly one
+worker, however many workers and clients subscribe: a worker with
+subscribers takes a per-route lease in the shared cache, and only the lease
+holder calls upstream and writes the board to the shared cache. Other
+workers read that board and fan it out to their own subscribers. Every
+board is diffed against the previous one and only the changes are sent. A
+worker's watch starts with its first subscriber and stops when the last one
+leaves, releasing the lease so another worker can take the route over.
+
+Station codes are validated, and a polled route also takes one of
+``LIVE_BOARD_MAX_ROUTES`` shared slots, so clients cannot start a poll loop
+per made-up pair on any worker.
+"""
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.core.cache import PersistentCache, cache
+from app.core.config import settings
+from app.core.logger import logger
+from app.utils.exceptions import AppException
+from providers.railway.agent import RailMCP
+from tools.rail_tool import _invalid_station_codes
+
+Route = Tuple[str, str, int]
+Board = Dict[str, Dict[str, Any]]
+
+LIVE_BOARD_NAMESPACE = "live_board"
+
+_TRAIN_NUMBER_FIELDS = ("train_number", "trainNumber", "train_no", "trainNo")
+
+
+def normalise_board(payload: Any) -> Board:
+    """Key the upstream train list by train number"""
+    rows = payload.get("data") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        return {}
+    board = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            continue
+        number = next((row[f] for f in _TRAIN_NUMBER_FIELDS if row.get(f)), None)
+        board[str(number) if number is not None else f"row-{index}"] = row
+    return board
+
+
+def diff_boards(previous: Board, current: Board) -> Dict[str, Any]:
+    """Trains added, removed, and the changed fields of trains present in both"""
+    added = {k: v for k, v in current.items() if k not in previous}
+    removed = [k for k in previous if k not in current]
+    updated = {}
+    for key, row in current.items():
+        old = previous.get(key)
+        if old is None or old == row:
+            continue
+        changes = {field: value for field, value in row.items() if old.get(field) != value}
+        changes.update({field: None for field in old if field not in row})
+        updated[key] = changes
+    return {"added": added, "updated": updated, "removed": removed}
+
+
+class RouteWatch:
+    """Subscribers and poll state of one route"""
+
+    def __init__(self, route: Route):
+        self.route = route
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.board: Optional[Board] = None
+        self.updated_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Shared slot held while this worker polls the route upstream
+        self.slot: Optional[int] = None
+
+
+class LiveBoard:
+    def __init__(
+        self,
+        poll_interval: float = 30,
+        subscriber_queue_size: int = 32,
+        max_routes: int = 50,
+        follow_interval: float = 2,
+        store: PersistentCache = cache,
+    ):
+        self.poll_interval = poll_interval
+        self.subscriber_queue_size = subscriber_queue_size
+        self.max_routes = max_routes
+        self.follow_interval = follow_interval
+        self.store = store
+        # Leases outlive a missed renewal, and expire if their holder dies
+        self.lease_ttl = poll_interval * 3
+        self._owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._watches: Dict[Route, RouteWatch] = {}
+
+    def check_route(self, from_station: str, to_station: str, hours: int = 1) -> Route:
+        """
+        The normalised route, or AppException when a code is malformed (422)
+        or a new route would exceed ``max_routes`` (429)
+        """
+        route = (from_station.upper(), to_station.upper(), hours)
+        invalid = _invalid_station_codes(route[0], route[1])
+        if invalid:
+            raise AppException(invalid["error"], status_code=422)
+        if route not in self._watches and not self._route_available(route):
+            raise AppException("Too many live boards are being watched, please retry later", status_code=429)
+        return route
+
+    @asynccontextmanager
+    async def subscribe(self, from_station: str, to_station: str, hours: int = 1) -> AsyncIterator[asyncio.Queue]:
+        """
+        Yield a queue of board messages for a route. The first message is a
+        snapshot when the route already has one; the rest are deltas. Raises
+        like ``check_route``.
+        """
+        route = self.check_route(from_station, to_station, hours)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+
+        watch = self._watches.get(route)
+        if watch is None:
+            watch = self._watches[route] = RouteWatch(route)
+        watch.subscribers.add(queue)
+        if watch.board is not None:
+            queue.put_nowait(self._snapshot(watch))
+        if watch.task is None:
+            # Start from an empty context so the loop does not inherit the first
+            # subscriber's request id or trace
+            watch.task = contextvars.Context().run(asyncio.create_task, self._poll(watch))
+            logger.info(f"Live board polling started for {route[0]} -> {route[1]}")
+
+        try:
+            yield queue
+        finally:
+            watch.subscribers.discard(queue)
+            if not watch.subscribers:
+                watch.task.cancel()
+                self._watches.pop(route, None)
+                self._release(watch)
+                logger.info(f"Live board polling stopped for {route[0]} -> {route[1]}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "route": list(watch.route),
+                "subscribers": len(watch.subscribers),
+                "polling": watch.slot is not None,
+                "updated_at": watch.updated_at,
+            }
+            for watch in self._watches.values()
+        ]
+
+    async def stop(self):
+        for watch in list(self._watches.values()):
+            if watch.task is not None:
+                watch.task.cancel()
+            self._release(watch)
+        self._watches.clear()
+
+    async def _poll(self, watch: RouteWatch):
+        from_station, to_station, hours = watch.route
+        while True:
+            interval = self.follow_interval
+            try:
+                if self._hold_lease(watch):
+                    interval = self.poll_interval
+                    payload = await asyncio.to_thread(RailMCP.get_live_station, from_station, to_station, hours)
+                    board, updated_at = normalise_board(payload), time.time()
+                    self.store.set(LIVE_BOARD_NAMESPACE, "board", *watch.route,
+                                   value={"board": board, "updated_at": updated_at}, ttl=self.lease_ttl)
+                    self._apply(watch, board, updated_at)
+                else:
+                    self._follow(watch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Live board poll failed for {from_station} -> {to_station}: {str(e)}")
+                self._publish(watch, {"type": "error", "error": str(e), "at": time.time()})
+            await asyncio.sleep(interval)
+
+    def _follow(self, watch: RouteWatch):
+        """Fan out the board written by the worker holding the route's lease, when it is new"""
+        entry = self.store.get(LIVE_BOARD_NAMESPACE, "board", *watch.route, fresh=True)
+        if entry is not None and entry["updated_at"] != watch.updated_at:
+            self._apply(watch, entry["board"], entry["updated_at"])
+
+    def _route_available(self, route: Route) -> bool:
+        """True when some worker already polls the route, or a shared slot is free for it"""
+        if self.store.get(LIVE_BOARD_NAMESPACE, "lease", *route, fresh=True) is not None:
+            return True
+        return any(
+            self.store.get(LIVE_BOARD_NAMESPACE, "slot", slot, fresh=True) is None
+            for slot in range(self.max_routes)
+        )
+
+    def _hold_lease(self, watch: RouteWatch) -> bool:
+        """
+        Renew this worker's lease on the route, or take it (and a shared slot)
+        when nobody holds it. False when another worker polls the route.
+        """
+        route = watch.route
+        if watch.slot is not None:
+            if self.store.get(LIVE_BOARD_NAMESPACE, "lease", *route, fresh=True) == self._owner:
+                self.store.set(LIVE_BOARD_NAMESPACE, "lease", *route, value=self._owner, ttl=self.lease_ttl)
+                self.store.set(LIVE_BOARD_NAMESPACE, "slot", watch.slot, value=list(route), ttl=self.lease_ttl)
+                return True
+            # The lease expired and another worker took the route over
+            watch.slot = None
+        if not self.store.add(LIVE_BOARD_NAMESPACE, "lease", *route, value=self._owner, ttl=self.lease_ttl):
+            return False
+        for slot in range(self.max_routes):
+            if self.store.add(LIVE_BOARD_NAMESPACE, "slot", slot, value=list(route), ttl=self.lease_ttl):
+                watch.slot = slot
+                logger.info(f"Live board lease taken for {route[0]} -> {route[1]}")
+                return True
+        self.store.delete(LIVE_BOARD_NAMESPACE, "lease", *route)
+        return False
+
+    def _release(self, watch: RouteWatch):
+        """Give up the route's lease and slot, if this worker holds them"""
+        if watch.slot is None:
+            return
+        if self.store.get(LIVE_BOARD_NAMESPACE, "lease", *watch.route, fresh=True) == self._owner:
+            self.store.delete(LIVE_BOARD_NAMESPACE, "lease", *watch.route)
+            self.store.delete(LIVE_BOARD_NAMESPACE, "slot", watch.slot)
+        watch.slot = None
+
+    def _apply(self, watch: RouteWatch, board: Board, updated_at: float):
+        previous = watch.board
+        watch.board = board
+        watch.updated_at = updated_at
+        if previous is None:
+            self._publish(watch, self._snapshot(watch))
+            return
+        delta = diff_boards(previous, board)
+        if delta["added"] or delta["updated"] or delta["removed"]:
+            self._publish(watch, {"type": "delta", "at": watch.updated_at, **delta})
+
+    def _publish(self, watch: RouteWatch, message: Dict[str, Any]):
+        for queue in list(watch.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A subscriber that fell behind cannot apply further deltas;
+                # replace its backlog with a fresh snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot(watch))
+
+    @staticmethod
+    def _snapshot(watch: RouteWatch) -> Dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "at": watch.updated_at,
+            "route": {"from_station": watch.route[0], "to_station": watch.route[1], "hours": watch.route[2]},
+            "trains": watch.board or {},
+        }
+
+
+live_board = LiveBoard(
+    poll_interval=settings.LIVE_BOARD_POLL_INTERVAL_SECONDS,
+    subscriber_queue_size=settings.LIVE_BOARD_SUBSCRIBER_QUEUE_SIZE,
+    max_routes=settings.LIVE_BOARD_MAX_ROUTES,
+    follow_interval=settings.LIVE_BOARD_FOLLOW_INTERVAL_SECONDS,
+)
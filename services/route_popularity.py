@@ -0,0 +1,46 @@
+"""
+Tracks which train-search routes live traffic asks for, so the cache warmer
+knows what to keep fresh.
+"""
+import threading
+from collections import Counter
+from itertools import permutations
+from typing import List, Tuple
+
+from app.constants.stations import CITY_STATION_MAP, METRO_CITIES
+
+Route = Tuple[str, str, int]
+
+
+class RoutePopularity:
+    """Thread-safe, exponentially decayed request counter per route"""
+
+    def __init__(self, decay: float = 0.9):
+        self.decay = decay
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, from_station: str, to_station: str, hours: int = 24, weight: float = 1.0):
+        with self._lock:
+            self._counts[(from_station.upper(), to_station.upper(), hours)] += weight
+
+    def seed_metro_routes(self, hours: int = 24, weight: float = 0.1):
+        """Give metro pairs a small head start so they are warm before any traffic"""
+        codes = {CITY_STATION_MAP[city] for city in METRO_CITIES}
+        for from_code, to_code in permutations(sorted(codes), 2):
+            self.record(from_code, to_code, hours, weight=weight)
+
+    def top(self, n: int) -> List[Route]:
+        with self._lock:
+            return [route for route, _ in self._counts.most_common(n)]
+
+    def decay_counts(self):
+        """Age old traffic so the ranking follows what users ask for now"""
+        with self._lock:
+            for route in list(self._counts):
+                self._counts[route] *= self.decay
+                if self._counts[route] < 0.01:
+                    del self._counts[route]
+
+
+route_popularity = RoutePopularity()
@@ -0,0 +1,119 @@
+"""
+Nearest-station lookup for towns and localities with no mapped station.
+
+Station coordinates from the bundled gazetteer are projected onto the unit
+sphere and stored in a k-d tree, so the k nearest junctions to a place are
+found in a few dozen distance checks without any upstream call. Chord
+length on the sphere grows with great-circle distance, so nearest in the
+tree is nearest on the ground.
+"""
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.constants.gazetteer import PLACE_COORDINATES, STATION_COORDINATES
+
+EARTH_RADIUS_KM = 6371.0
+
+Point = Tuple[float, float, float]
+
+
+def to_unit_vector(lat: float, lon: float) -> Point:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class KDNode:
+    __slots__ = ("point", "key", "axis", "left", "right")
+
+    def __init__(self, point: Point, key: str, axis: int):
+        self.point = point
+        self.key = key
+        self.axis = axis
+        self.left: Optional["KDNode"] = None
+        self.right: Optional["KDNode"] = None
+
+
+class KDTree:
+    """Static 3-d tree; built once from ``(point, key)`` pairs"""
+
+    def __init__(self, items: List[Tuple[Point, str]]):
+        self.size = len(items)
+        self.root = self._build(list(items), 0)
+
+    def _build(self, items: List[Tuple[Point, str]], depth: int) -> Optional[KDNode]:
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[0][axis])
+        middle = len(items) // 2
+        node = KDNode(items[middle][0], items[middle][1], axis)
+        node.left = self._build(items[:middle], depth + 1)
+        node.right = self._build(items[middle + 1:], depth + 1)
+        return node
+
+    def nearest(self, target: Point, k: int) -> List[Tuple[float, str]]:
+        """The ``k`` closest keys as ``(squared chord distance, key)``, closest first"""
+        best: List[Tuple[float, str]] = []  # max-heap via negated distances
+
+        def visit(node: Optional[KDNode]):
+            if node is None:
+                return
+            distance = sum((a - b) ** 2 for a, b in zip(node.point, target))
+            if len(best) < k:
+                heapq.heappush(best, (-distance, node.key))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, node.key))
+
+            offset = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if offset < 0 else (node.right, node.left)
+            visit(near)
+            # The far side can only hold closer points if the splitting plane is
+            # nearer than the current k-th best
+            if len(best) < k or offset * offset < -best[0][0]:
+                visit(far)
+
+        visit(self.root)
+        return sorted((-d, key) for d, key in best)
+
+
+class StationLocator:
+    def __init__(self, stations: Dict[str, Tuple[str, float, float]], places: Dict[str, Tuple[float, float]]):
+        self.stations = stations
+        # Station cities double as places so "kalyan" or "itarsi" resolve too
+        self.places = {name: (lat, lon) for name, lat, lon in stations.values()}
+        self.places.update(places)
+        self.tree = KDTree([(to_unit_vector(lat, lon), code) for code, (_, lat, lon) in stations.items()])
+
+    def locate(self, place: str) -> Optional[Tuple[float, float]]:
+        return self.places.get(place.lower().strip())
+
+    def nearest_stations(self, lat: float, lon: float, k: int = 3,
+                         max_distance_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Closest junctions to a coordinate with their straight-line distance in km"""
+        results = []
+        for _, code in self.tree.nearest(to_unit_vector(lat, lon), k):
+            name, station_lat, station_lon = self.stations[code]
+            distance = haversine_km(lat, lon, station_lat, station_lon)
+            if max_distance_km is not None and distance > max_distance_km:
+                break
+            results.append({"code": code, "name": name, "distance_km": round(distance, 1)})
+        return results
+
+    def nearest_to_place(self, place: str, k: int = 3,
+                         max_distance_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Closest junctions to a named place; empty when the place is not in the gazetteer"""
+        coordinates = self.locate(place)
+        if coordinates is None:
+            return []
+        return self.nearest_stations(*coordinates, k=k, max_distance_km=max_distance_km)
+
+
+station_locator = StationLocator(STATION_COORDINATES, PLACE_COORDINATES)
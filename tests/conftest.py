@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings are read at import time; keep test runs off real keys and the
+# working tree's cache files
+os.environ.setdefault("RAPIDAPI_KEY", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+_state_dir = tempfile.mkdtemp(prefix="rail-agent-tests-")
+os.environ.setdefault("CACHE_DB_PATH", os.path.join(_state_dir, "cache.db"))
+os.environ.setdefault("CHECKPOINT_DB_PATH", os.path.join(_state_dir, "checkpoints.db"))
@@ -0,0 +1,96 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+import pytest
+
+from app.core.cache import PersistentCache
+from app.utils.exceptions import AppException
+from providers.railway.agent import RailMCP
+from services.live_board import LiveBoard
+
+ROUTE = ("NDLS", "BCT", 1)
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    return PersistentCache(str(tmp_path / "cache.db"))
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Records live board calls; each returns the next board in ``boards``"""
+    calls = []
+    boards = [
+        {"data": [{"train_number": "12951", "delay": 0}]},
+        {"data": [{"train_number": "12951", "delay": 15}]},
+    ]
+
+    def get_live_station(from_station, to_station, hours=1):
+        calls.append((from_station, to_station, hours))
+        return boards[min(len(calls), len(boards)) - 1]
+
+    monkeypatch.setattr(RailMCP, "get_live_station", staticmethod(get_live_station))
+    return calls
+
+
+def make_board(store, **kwargs):
+    return LiveBoard(poll_interval=60, follow_interval=0.02, store=store, **kwargs)
+
+
+async def next_message(queue):
+    return await asyncio.wait_for(queue.get(), timeout=2)
+
+
+def test_one_worker_polls_a_route_and_others_follow(shared_cache, upstream):
+    first, second = make_board(shared_cache), make_board(shared_cache)
+
+    async def scenario():
+        async with first.subscribe(*ROUTE) as first_queue:
+            assert (await next_message(first_queue))["trains"]["12951"]["delay"] == 0
+            async with second.subscribe(*ROUTE) as second_queue:
+                snapshot = await next_message(second_queue)
+                assert snapshot["type"] == "snapshot"
+                assert snapshot["trains"]["12951"]["delay"] == 0
+                await asyncio.sleep(0.1)
+                assert [s["polling"] for s in first.stats() + second.stats()] == [True, False]
+
+    asyncio.run(scenario())
+    assert len(upstream) == 1
+
+
+def test_lease_passes_to_a_following_worker(shared_cache, upstream):
+    first, second = make_board(shared_cache), make_board(shared_cache)
+
+    async def scenario():
+        async with AsyncExitStack() as first_stack, AsyncExitStack() as second_stack:
+            first_queue = await first_stack.enter_async_context(first.subscribe(*ROUTE))
+            await next_message(first_queue)
+            second_queue = await second_stack.enter_async_context(second.subscribe(*ROUTE))
+            await next_message(second_queue)
+
+            # The polling worker's last subscriber leaves; the other worker
+            # takes the route over and sends only what changed
+            await first_stack.aclose()
+            delta = await next_message(second_queue)
+            assert delta["type"] == "delta"
+            assert delta["updated"] == {"12951": {"delay": 15}}
+            assert second.stats()[0]["polling"] is True
+
+    asyncio.run(scenario())
+    assert len(upstream) == 2
+
+
+def test_route_cap_is_shared_between_workers(shared_cache, upstream):
+    first, second = make_board(shared_cache, max_routes=1), make_board(shared_cache, max_routes=1)
+
+    async def scenario():
+        async with first.subscribe(*ROUTE) as queue:
+            await next_message(queue)
+            # Already polled elsewhere, so following it costs no slot
+            assert second.check_route(*ROUTE) == ROUTE
+            with pytest.raises(AppException) as error:
+                second.check_route("HWH", "SBC", 1)
+            assert error.value.status_code == 429
+        assert second.check_route("HWH", "SBC", 1) == ("HWH", "SBC", 1)
+
+    asyncio.run(scenario())
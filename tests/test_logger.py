@@ -0,0 +1,45 @@
+import io
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+
+from app.core.logger import LOG_FORMAT, CorrelationIdFilter, JsonFormatter, LogQueueHandler
+
+
+def log_through_queue(formatter: logging.Formatter) -> str:
+    """Log one exception the way the app does, through the queue and listener"""
+    records: queue.Queue = queue.Queue(-1)
+    handler = LogQueueHandler(records)
+    handler.addFilter(CorrelationIdFilter())
+    out = io.StringIO()
+    stream_handler = logging.StreamHandler(out)
+    stream_handler.setFormatter(formatter)
+
+    test_logger = logging.getLogger("travel_app.tests.queue")
+    test_logger.propagate = False
+    test_logger.addHandler(handler)
+    listener = QueueListener(records, stream_handler)
+    listener.start()
+    try:
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            test_logger.error("Search failed for %s", "NDLS", exc_info=True)
+    finally:
+        listener.stop()
+        test_logger.removeHandler(handler)
+    return out.getvalue()
+
+
+def test_json_formatter_emits_exception_logged_through_the_queue():
+    entry = json.loads(log_through_queue(JsonFormatter()))
+    assert entry["message"] == "Search failed for NDLS"
+    assert entry["exception"].startswith("Traceback")
+    assert "ZeroDivisionError: division by zero" in entry["exception"]
+
+
+def test_plain_formatter_prints_the_traceback_once():
+    output = log_through_queue(logging.Formatter(LOG_FORMAT))
+    assert "| Search failed for NDLS\nTraceback" in output
+    assert output.count("ZeroDivisionError") == 1
@@ -0,0 +1,31 @@
+from agents.travel_graph import analyze_trains_node
+
+
+def journey(number, departure, changes=None):
+    train = {
+        "train_number": number,
+        "train_name": f"SERVICE {number}",
+        "departure": {"time": departure},
+        "arrival": {"time": "23:00"},
+        "fare": 1000,
+    }
+    if changes is not None:
+        train["changes"] = changes
+    return train
+
+
+TRAINS = [
+    journey("12951", "16:55"),
+    journey("BUS-7", "09:30", changes=1),
+    journey("AI-887", "07:00", changes=0),
+]
+
+
+def filtered_numbers(**preferences):
+    state = {"available_trains": TRAINS, "time_preference": "any", **preferences}
+    return [t["train_number"] for t in analyze_trains_node(state)["filtered_trains"]]
+
+
+def test_direct_only_drops_journeys_with_changes():
+    assert filtered_numbers(direct_only=False) == ["AI-887", "BUS-7", "12951"]
+    assert filtered_numbers(direct_only=True) == ["AI-887", "12951"]
@@ -1,13 +1,35 @@
 """
 LangChain tools for railway data fetching
+
+The functions are plain callables so importing this module does not load
+LangChain; ``get_railway_tools()`` wraps them as LangChain tools on demand.
 """
-from langchain.tools import tool
-from typing import Dict, Any, List
+import re
+import time
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 import requests
+from app.core.cache import cache
 from app.core.config import settings
-from app.core.logger import logger
+from app.core.logger import hot_logger, logger
+from app.core.tracing import start_span
+from app.utils.serialization import dumps
+from app.constants.stations import CITY_STATION_MAP, KNOWN_STATION_CODES
+from services.availability_index import availability_index
+from services.station_locator import station_locator
+from tools.train_decoder import decode_train_search
+from services.route_popularity import route_popularity
+
+TRAIN_SEARCH_NAMESPACE = "trains"
+TRAIN_SEARCH_BODY_NAMESPACE = "trains_body"
+STATION_SEARCH_NAMESPACE = "stations"
+
+# Trains kept per search; the rest of the payload is counted but not decoded
+TRAIN_SEARCH_LIMIT = 15
+
+# Indian Railways station codes are 1-5 letters; anything else cannot match
+STATION_CODE_PATTERN = re.compile(r"^[A-Z]{1,5}$")
 
-@tool
 def search_trains(from_station: str, to_station: str, hours: int = 24) -> Dict[str, Any]:
     """
     Search for trains between two stations. Use this tool when you need to find available trains.
@@ -20,6 +42,149 @@ def search_trains(from_station: str, to_station: str, hours: int = 24) -> Dict[s
     Returns:
         Dictionary containing train information including departure times, arrival times, duration, and train details
     """
+    from_station = from_station.upper()
+    to_station = to_station.upper()
+    invalid = _invalid_station_codes(from_station, to_station)
+    if invalid:
+        return invalid
+    result, _ = _search_trains(from_station, to_station, hours)
+    return result
+
+def _search_trains(from_station: str, to_station: str, hours: int, encode: bool = False) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """
+    Cached search for validated codes. With ``encode``, also returns the
+    JSON body, encoded once whether it comes from the cache or upstream.
+    """
+    route_popularity.record(from_station, to_station, hours)
+
+    with start_span("rail.search_trains", route=f"{from_station}-{to_station}", hours=hours) as span:
+        cached = cache.get_with_expiry(TRAIN_SEARCH_NAMESPACE, from_station, to_station, hours)
+        span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            hot_logger.info("Train search cache hit: %s -> %s", from_station, to_station)
+            result, expires_at = cached
+            if not encode:
+                return result, None
+            # Only the body was evicted: store it again with the result's own
+            # expiry, so re-storing never extends the life of old trains
+            body = dumps(result)
+            cache.set_bytes(TRAIN_SEARCH_BODY_NAMESPACE, from_station, to_station, hours,
+                            value=body, expires_at=expires_at)
+            return result, body
+
+        result = fetch_trains_from_upstream(from_station, to_station, hours)
+        return result, store_train_search(from_station, to_station, hours, result)
+
+def store_train_search(from_station: str, to_station: str, hours: int, result: Dict[str, Any]) -> bytes:
+    """
+    Cache a search result and its encoded JSON body under its route key.
+    Empty searches are cached too, briefly, so a pair with no trains is not
+    re-queried on every attempt, but never in place of a live entry.
+    Upstream errors are not cached: they may be transient, and a retry
+    (or a resumed run) must reach the upstream again.
+    """
+    body = dumps(result)
+    if not result.get("success"):
+        return body
+    if result.get("trains"):
+        ttl = settings.TRAIN_SEARCH_CACHE_TTL_SECONDS
+        availability_index.ingest((from_station, to_station, hours), result["trains"], time.time() + ttl)
+        cache.set(TRAIN_SEARCH_NAMESPACE, from_station, to_station, hours, value=result, ttl=ttl)
+        cache.set_bytes(TRAIN_SEARCH_BODY_NAMESPACE, from_station, to_station, hours, value=body, ttl=ttl)
+        return body
+
+    ttl = settings.NEGATIVE_CACHE_TTL_SECONDS
+    if cache.add(TRAIN_SEARCH_NAMESPACE, from_station, to_station, hours, value=result, ttl=ttl):
+        cache.set_bytes(TRAIN_SEARCH_BODY_NAMESPACE, from_station, to_station, hours, value=body, ttl=ttl)
+    return body
+
+def _invalid_station_codes(*codes: str) -> Optional[Dict[str, Any]]:
+    """Error result for malformed station codes, returned without calling upstream"""
+    invalid = [code for code in codes if not STATION_CODE_PATTERN.match(code)]
+    if not invalid:
+        return None
+    return {
+        "success": False,
+        "error": f"Invalid station code: {', '.join(invalid)}",
+        "trains": []
+    }
+
+def search_trains_json(from_station: str, to_station: str, hours: int = 24) -> bytes:
+    """
+    Same as ``search_trains`` but returns the encoded JSON body. Cache hits are
+    served from the stored bytes without decoding or re-encoding the trains.
+    """
+    from_station = from_station.upper()
+    to_station = to_station.upper()
+    invalid = _invalid_station_codes(from_station, to_station)
+    if invalid:
+        return dumps(invalid)
+
+    body = cache.get_bytes(TRAIN_SEARCH_BODY_NAMESPACE, from_station, to_station, hours)
+    if body is not None:
+        route_popularity.record(from_station, to_station, hours)
+        return body
+
+    _, body = _search_trains(from_station, to_station, hours, encode=True)
+    return body
+
+def query_availability(
+    from_station: Optional[str] = None,
+    to_station: Optional[str] = None,
+    hours: int = 24,
+    travel_class: Optional[str] = None,
+    quota: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    max_fare: Optional[float] = None,
+    min_prediction: Optional[float] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    Query seat availability across cached train searches without calling the
+    rail API. The index is per process, so routes searched by other workers
+    are first loaded from the shared search cache: the given route, or every
+    cached route when none is given.
+    """
+    route = None
+    if from_station and to_station:
+        route = (from_station.upper(), to_station.upper(), hours)
+        if not availability_index.has_route(route):
+            _index_cached_search(route, cache.expires_at(TRAIN_SEARCH_NAMESPACE, *route))
+    else:
+        for parts, expires_at in cache.keys(TRAIN_SEARCH_NAMESPACE):
+            if len(parts) != 3 or not parts[2].isdigit():
+                continue
+            cached_route = (parts[0], parts[1], int(parts[2]))
+            # Re-read only routes searched again since they were indexed
+            if availability_index.expires_at(cached_route) != expires_at:
+                _index_cached_search(cached_route, expires_at)
+
+    results = availability_index.query(
+        route=route,
+        travel_class=travel_class,
+        quota=quota,
+        statuses=statuses,
+        max_fare=max_fare,
+        min_prediction=min_prediction,
+        limit=limit,
+    )
+    return {
+        "success": True,
+        "route_cached": route is None or availability_index.has_route(route),
+        "total": len(results),
+        "results": results,
+    }
+
+def _index_cached_search(route: Tuple[str, str, int], expires_at: Optional[float]):
+    """Add a search from the shared cache to this process's availability index"""
+    if expires_at is None:
+        return
+    cached = cache.get(TRAIN_SEARCH_NAMESPACE, *route, fresh=True)
+    if cached is not None:
+        availability_index.ingest(route, cached.get("trains", []), expires_at)
+
+def fetch_trains_from_upstream(from_station: str, to_station: str, hours: int = 24) -> Dict[str, Any]:
+    """Query the rail API directly, bypassing the cache"""
     try:
         # url = "https://irctc1.p.rapidapi.com/api/v3/getLiveStation"
         url = "https://cttrainsapi.confirmtkt.com/api/v1/trains/search"
@@ -33,71 +198,19 @@ def search_trains(from_station: str, to_station: str, hours: int = 24) -> Dict[s
             "hours": hours,
         }
         
-        logger.info(f"Searching trains: {from_station} -> {to_station}")
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Process and simplify the response
-        trains = data.get("data", {}).get("trainList", [])
-        logger.info(f"Found {len(trains)} trains")
-        
-        processed_trains = []
-        for train in trains:
-            # Process availability information
-            availability_info = {}
-            for class_type in train.get("avlClasses", []):
-                general_quota = train.get("availabilityCache", {}).get(class_type, {})
-                tatkal_quota = train.get("availabilityCacheTatkal", {}).get(class_type, {})
-                
-                availability_info[class_type] = {
-                    "general": {
-                        "status": general_quota.get("availability", "NOT AVAILABLE"),
-                        "fare": general_quota.get("fare", "0"),
-                        "prediction": general_quota.get("prediction", "No prediction"),
-                        "prediction_percentage": general_quota.get("predictionPercentage", 0)
-                    },
-                    "tatkal": {
-                        "status": tatkal_quota.get("availability", "NOT AVAILABLE"),
-                        "fare": tatkal_quota.get("fare", "0")
-                    }
-                }
-            
-            # Create simplified train object
-            processed_train = {
-                "train_number": train.get("trainNumber"),
-                "train_name": train.get("trainName"),
-                "from_station": {
-                    "code": train.get("fromStnCode"),
-                    "name": train.get("fromStnName"),
-                    "city": train.get("fromCityName")
-                },
-                "to_station": {
-                    "code": train.get("toStnCode"),
-                    "name": train.get("toStnName"),
-                    "city": train.get("toCityName")
-                },
-                "departure": {
-                    "time": train.get("departureTime"),
-                    "date": train.get("departureDate")
-                },
-                "arrival": {
-                    "time": train.get("arrivalTime")
-                },
-                "duration_mins": train.get("duration"),
-                "distance_km": train.get("distance"),
-                "available_classes": train.get("avlClasses", []),
-                "availability": availability_info,
-                "running_days": train.get("runningDays"),
-                "has_pantry": train.get("hasPantry", False),
-                "train_rating": train.get("trainRating")
-            }
-            processed_trains.append(processed_train)
+        hot_logger.info("Searching trains: %s -> %s", from_station, to_station)
+        with start_span("rail.upstream_request", route=f"{from_station}-{to_station}") as span:
+            response = requests.get(url, params=params, timeout=15)
+            span.set_attributes(http_status=response.status_code, response_bytes=len(response.content))
+            response.raise_for_status()
+            # Only the trains that survive the limit are decoded into dicts
+            trains, total_trains = decode_train_search(response.content, TRAIN_SEARCH_LIMIT)
+        hot_logger.info("Found %d trains", total_trains)
         
         return {
             "success": True,
-            "total_trains": len(processed_trains),
-            "trains": processed_trains[:15],  # Limit to top 15 for efficiency
+            "total_trains": total_trains,
+            "trains": trains,
             "from_station": from_station.upper(),
             "to_station": to_station.upper()
         }
@@ -110,7 +223,6 @@ def search_trains(from_station: str, to_station: str, hours: int = 24) -> Dict[s
             "trains": []
         }
 
-@tool
 def search_station_code(station_name: str) -> Dict[str, Any]:
     """
     Search for station codes by station name. Use this when you have a city/station name but need the code.
@@ -121,6 +233,11 @@ def search_station_code(station_name: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing matching stations with their codes
     """
+    cache_key = station_name.lower().strip()
+    cached = cache.get(STATION_SEARCH_NAMESPACE, cache_key)
+    if cached is not None:
+        return cached
+
     try:
         url = "https://irctc1.p.rapidapi.com/api/v1/searchStation"
         headers = {
@@ -129,75 +246,76 @@ def search_station_code(station_name: str) -> Dict[str, Any]:
         }
         params = {"query": station_name}
         
-        logger.info(f"Searching station code for: {station_name}")
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
+        hot_logger.info("Searching station code for: %s", station_name)
+        with start_span("rail.station_search", query=cache_key) as span:
+            response = requests.get(url, headers=headers, params=params, timeout=10)
+            span.set_attribute("http_status", response.status_code)
+            response.raise_for_status()
         data = response.json()
         
-        return {
+        result = {
             "success": True,
             "stations": data.get("data", [])[:5]  # Top 5 matches
         }
+        # Unknown names are remembered only briefly
+        ttl = settings.STATION_CACHE_TTL_SECONDS if result["stations"] else settings.NEGATIVE_CACHE_TTL_SECONDS
+        cache.set(STATION_SEARCH_NAMESPACE, cache_key, value=result, ttl=ttl)
+        return result
         
     except Exception as e:
         logger.error(f"Error searching station: {str(e)}")
-        # Fallback to common station mapping
+        # Not cached, so a retry reaches the upstream again
         return {
             "success": False,
             "error": str(e),
             "stations": []
         }
 
-@tool
-def get_station_code_from_city(city_name: str) -> str:
+def get_station_code_from_city(city_name: str) -> Optional[str]:
     """
-    Get the primary station code for a major Indian city. Use this for quick lookups of common cities.
+    Get the primary station code for an Indian city or station. Use this for quick lookups of common cities.
     
     Args:
-        city_name: Name of the city (e.g., 'Delhi', 'Mumbai', 'Bangalore')
+        city_name: Name of the city (e.g., 'Delhi', 'Mumbai', 'Bangalore') or a station code (e.g., 'NDLS')
     
     Returns:
-        Station code as a string (e.g., 'NDLS', 'BCT', 'SBC')
-    """
-    # Common city to station code mapping
-    city_station_map = {
-        "delhi": "NDLS",
-        "new delhi": "NDLS",
-        "yamunanagar": "YJUD",  
-        "mumbai": "BCT",
-        "bangalore": "SBC",
-        "bengaluru": "SBC",
-        "chennai": "MAS",
-        "hyderabad": "HYB",
-        "kolkata": "HWH",
-        "pune": "PUNE",
-        "ahmedabad": "ADI",
-        "jaipur": "JP",
-        "lucknow": "LKO",
-        "kanpur": "CNB",
-        "nagpur": "NGP",
-        "indore": "INDB",
-        "bhopal": "BPL",
-        "patna": "PNBE",
-        "agra": "AGC",
-        "varanasi": "BSB",
-        "surat": "ST",
-        "kochi": "ERS",
-        "coimbatore": "CBE",
-        "guwahati": "GHY",
-        "chandigarh": "CDG",
-        "thiruvananthapuram": "TVC",
-        "vijayawada": "BZA",
-        "visakhapatnam": "VSKP",
-        "bhubaneswar": "BBS",
-        "goa": "MAO",
-        "amritsar": "ASR"
-    }
-    
-    city_lower = city_name.lower().strip()
-    code = city_station_map.get(city_lower, city_name.upper()[:4])
-    logger.info(f"Mapped {city_name} to {code}")
-    return code
+        Station code as a string (e.g., 'NDLS', 'BCT', 'SBC'), or None when the place cannot be resolved
+    """
+    return resolve_station(city_name)["code"]
+
+def find_nearest_stations(place: str) -> List[Dict[str, Any]]:
+    """Closest major junctions to a town in the offline gazetteer, nearest first"""
+    return station_locator.nearest_to_place(
+        place,
+        k=settings.NEAREST_STATION_CANDIDATES,
+        max_distance_km=settings.NEAREST_STATION_MAX_DISTANCE_KM,
+    )
+
+def resolve_station(place: str) -> Dict[str, Any]:
+    """
+    Resolve a place to a station code. Mapped cities and station codes win;
+    towns in the gazetteer resolve to their nearest junction with the other
+    nearby junctions as ``candidates``; anything else falls back to the
+    upstream station search.
+    """
+    place_lower = place.lower().strip()
+    code = CITY_STATION_MAP.get(place_lower)
+    if code is None and place_lower.upper() in KNOWN_STATION_CODES:
+        code = place_lower.upper()
+    candidates: List[Dict[str, Any]] = []
+    if code is None:
+        candidates = find_nearest_stations(place_lower)
+        code = candidates[0]["code"] if candidates else None
+    if code is None:
+        # Station search results, including misses, are cached
+        stations = search_station_code(place).get("stations") or []
+        code = stations[0].get("code") if stations else None
+    hot_logger.info("Mapped %s to %s", place, code)
+    return {"code": code, "candidates": candidates}
+
+@lru_cache(maxsize=1)
+def get_railway_tools() -> List[Any]:
+    """Export all tools as a list of LangChain tools"""
+    from langchain_core.tools import tool
 
-# Export all tools as a list
-railway_tools = [search_trains, search_station_code, get_station_code_from_city]
\ No newline at end of file
+    return [tool(search_trains), tool(search_station_code), tool(get_station_code_from_city)]
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Decoder for the confirmtkt train search payload.
+
+With msgspec installed the body is decoded against a schema: the train list
+is first split into raw JSON slices, and only the trains that survive the
+limit are decoded into typed records declaring just the fields we use.
+Without msgspec the body is parsed generically and, again, only the
+surviving trains are turned into response dicts.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logger import logger
+from app.utils.serialization import loads
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+NOT_AVAILABLE = "NOT AVAILABLE"
+NO_PREDICTION = "No prediction"
+
+
+def _availability(
+    classes: List[str], general: Dict[str, Any], tatkal: Dict[str, Any], quota
+) -> Dict[str, Dict[str, Any]]:
+    """Per-class availability; ``quota(value, field, default)`` reads one quota field"""
+    availability = {}
+    for class_type in classes:
+        general_quota = general.get(class_type)
+        tatkal_quota = tatkal.get(class_type)
+        availability[class_type] = {
+            "general": {
+                "status": quota(general_quota, "availability", NOT_AVAILABLE),
+                "fare": quota(general_quota, "fare", "0"),
+                "prediction": quota(general_quota, "prediction", NO_PREDICTION),
+                "prediction_percentage": quota(general_quota, "predictionPercentage", 0),
+            },
+            "tatkal": {
+                "status": quota(tatkal_quota, "availability", NOT_AVAILABLE),
+                "fare": quota(tatkal_quota, "fare", "0"),
+            },
+        }
+    return availability
+
+
+def _dict_quota(quota: Optional[Dict[str, Any]], field: str, default: Any) -> Any:
+    return quota.get(field, default) if quota else default
+
+
+def train_from_dict(train: Dict[str, Any]) -> Dict[str, Any]:
+    """Response dict for one train of a generically parsed payload"""
+    classes = train.get("avlClasses") or []
+    return {
+        "train_number": train.get("trainNumber"),
+        "train_name": train.get("trainName"),
+        "from_station": {
+            "code": train.get("fromStnCode"),
+            "name": train.get("fromStnName"),
+            "city": train.get("fromCityName"),
+        },
+        "to_station": {
+            "code": train.get("toStnCode"),
+            "name": train.get("toStnName"),
+            "city": train.get("toCityName"),
+        },
+        "departure": {
+            "time": train.get("departureTime"),
+            "date": train.get("departureDate"),
+        },
+        "arrival": {
+            "time": train.get("arrivalTime"),
+        },
+        "duration_mins": train.get("duration"),
+        "distance_km": train.get("distance"),
+        "available_classes": classes,
+        "availability": _availability(
+            classes,
+            train.get("availabilityCache") or {},
+            train.get("availabilityCacheTatkal") or {},
+            _dict_quota,
+        ),
+        "running_days": train.get("runningDays"),
+        "has_pantry": train.get("hasPantry", False),
+        "train_rating": train.get("trainRating"),
+    }
+
+
+def _decode_generic(body: bytes, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    trains = (loads(body).get("data") or {}).get("trainList") or []
+    return [train_from_dict(train) for train in trains[:limit]], len(trains)
+
+
+if msgspec is not None:
+
+    class Quota(msgspec.Struct):
+        availability: Any = NOT_AVAILABLE
+        fare: Any = "0"
+        prediction: Any = NO_PREDICTION
+        predictionPercentage: Any = 0
+
+    class TrainRecord(msgspec.Struct, rename="camel"):
+        """The fields of one upstream train that end up in a response"""
+        train_number: Any = None
+        train_name: Optional[str] = None
+        from_stn_code: Optional[str] = None
+        from_stn_name: Optional[str] = None
+        from_city_name: Optional[str] = None
+        to_stn_code: Optional[str] = None
+        to_stn_name: Optional[str] = None
+        to_city_name: Optional[str] = None
+        departure_time: Optional[str] = None
+        departure_date: Optional[str] = None
+        arrival_time: Optional[str] = None
+        duration: Any = None
+        distance: Any = None
+        avl_classes: Optional[List[str]] = None
+        availability_cache: Optional[Dict[str, Optional[Quota]]] = None
+        availability_cache_tatkal: Optional[Dict[str, Optional[Quota]]] = None
+        running_days: Any = None
+        has_pantry: Any = False
+        train_rating: Any = None
+
+    class _SearchData(msgspec.Struct, rename="camel"):
+        # Raw slices: trains past the limit are never decoded
+        train_list: Optional[List[msgspec.Raw]] = None
+
+    class _SearchPayload(msgspec.Struct):
+        data: Optional[_SearchData] = None
+
+    _payload_decoder = msgspec.json.Decoder(_SearchPayload)
+    _train_decoder = msgspec.json.Decoder(TrainRecord)
+
+    def _struct_quota(quota: Optional["Quota"], field: str, default: Any) -> Any:
+        return getattr(quota, field) if quota is not None else default
+
+    def train_from_record(record: "TrainRecord") -> Dict[str, Any]:
+        """Response dict for one decoded train record"""
+        classes = record.avl_classes or []
+        return {
+            "train_number": record.train_number,
+            "train_name": record.train_name,
+            "from_station": {
+                "code": record.from_stn_code,
+                "name": record.from_stn_name,
+                "city": record.from_city_name,
+            },
+            "to_station": {
+                "code": record.to_stn_code,
+                "name": record.to_stn_name,
+                "city": record.to_city_name,
+            },
+            "departure": {
+                "time": record.departure_time,
+                "date": record.departure_date,
+            },
+            "arrival": {
+                "time": record.arrival_time,
+            },
+            "duration_mins": record.duration,
+            "distance_km": record.distance,
+            "available_classes": classes,
+            "availability": _availability(
+                classes,
+                record.availability_cache or {},
+                record.availability_cache_tatkal or {},
+                _struct_quota,
+            ),
+            "running_days": record.running_days,
+            "has_pantry": record.has_pantry,
+            "train_rating": record.train_rating,
+        }
+
+
+def decode_train_search(body: bytes, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Decode a train search response body. Returns the first ``limit`` trains
+    as response dicts and the number of trains in the payload.
+    """
+    if msgspec is None:
+        return _decode_generic(body, limit)
+    try:
+        payload = _payload_decoder.decode(body)
+        raw_trains = (payload.data.train_list if payload.data else None) or []
+        trains = [train_from_record(_train_decoder.decode(raw)) for raw in raw_trains[:limit]]
+        return trains, len(raw_trains)
+    except msgspec.ValidationError as e:
+        # The upstream schema drifted; the generic path tolerates any shape
+        logger.warning(f"Train payload did not match the schema, decoding generically: {e}")
+        return _decode_generic(body, limit)